@@ -1,18 +1,12 @@
 #!/usr/bin/env python3
 import argparse
 import sys
-import ROOT
 from pathlib import Path
-try:
-    import cmsstyle as CMS  # noqa: F401
-except ImportError:
-    print("Warning: cmsstyle not available, using built-in fallback style.")
 import os
 import glob
 
-from src.style import StyleManager
-from src.loader import DataLoader
-from src.plotter import Plotter1D, Plotter2D, PlotterDataMC
+# ROOT, cmsstyle and the plotting/loading modules that pull them in are imported
+# inside main() after argument parsing, so `--help` doesn't pay ROOT start-up.
 from src.selections import FinalStateResolver
 from src.utils import parse_signal_name, parse_background_name
 
@@ -20,6 +14,26 @@ from src.config import AnalysisConfig, AnalysisMode, ModeConfig
 from src.input_config import (load_input_config, apply_config_to_args,
                                unique_files_from_groups, assemble_grouped_map)
 
+# Variable sets for the data/MC comparison plots
+EVENT_VARS = ('rjr_Ms', 'rjr_Rs', 'selCMet')
+EVENT_VARS_COMPRESSED = ('rjrIsr_RIsr', 'rjrIsr_PtIsr')
+HADSV_VARS = ('HadronicSV_mass', 'HadronicSV_dxy', 'HadronicSV_dxySig',
+              'HadronicSV_pOverE', 'HadronicSV_decayAngle', 'HadronicSV_cosTheta',
+              'HadronicSV_nTracks')
+LEPSV_VARS = ('LeptonicSV_mass', 'LeptonicSV_dxy', 'LeptonicSV_dxySig',
+              'LeptonicSV_pOverE', 'LeptonicSV_decayAngle', 'LeptonicSV_cosTheta')
+# mc_only variables (Gen-level) excluded — not present in data files
+PHOTON_VARS = tuple(v for v, c in AnalysisConfig.VARIABLES.items()
+                    if v.startswith('baseLinePhoton_') and not c.get('mc_only', False))
+# SV variables for an event flag, keyed by ('NHad' in flag, 'NLep' in flag):
+# only the relevant SV flavor(s), both when the flag names neither or both
+SV_VARS_BY_FLAVOR = {
+    (True, False): HADSV_VARS,
+    (False, True): LEPSV_VARS,
+    (True, True): HADSV_VARS + LEPSV_VARS,
+    (False, False): HADSV_VARS + LEPSV_VARS,
+}
+
 def expand_input_paths(input_paths):
     """
     Expand input paths to handle both individual files and directories with ROOT files.
@@ -67,8 +81,17 @@ def prompt_unblind_warning():
     """
     Interactive warning prompt for unblinding data with cursor navigation.
     Returns True if user chooses to continue, False if abort.
+    Without a terminal on stdin (batch jobs, redirected input) there is no one
+    to answer, so unblinding proceeds only if LLP_UNBLIND_ACK=1 is set.
     """
-    import sys
+    if not sys.stdin.isatty():
+        if os.environ.get("LLP_UNBLIND_ACK") == "1":
+            print("⚠️  --unblind acknowledged via LLP_UNBLIND_ACK=1 (non-interactive). Proceeding with data unblinding...")
+            return True
+        print("✓ --unblind requested without a terminal; set LLP_UNBLIND_ACK=1 to confirm. "
+              "Aborting. Data will remain blinded.")
+        return False
+
     import termios
     import tty
     
@@ -174,17 +197,48 @@ def _write_palette_setup(f_out):
         root [0] f->Get("setup")->Exec()   // restores palette
         root [1] f->Get("my_canvas")->Draw()
     """
+    import ROOT
     macro = ROOT.TMacro("setup")
     macro.AddLine("gStyle->SetPalette(kViridis);")
     f_out.cd()
     macro.Write()
 
 
+# Path of the multi-page PDF currently open for the 'pdf-bundle' format.
+# ROOT keeps a single global PostScript/PDF stream (gVirtualPS), so only one
+# bundle can be open at a time; bundles are therefore kept per region folder,
+# which main() fills one after the other.
+_open_pdf_bundle = None
+
+
+def _print_to_pdf_bundle(canvas, bundle_path, canvas_name):
+    """Append canvas as a page of bundle_path, opening the bundle on first use."""
+    global _open_pdf_bundle
+    if _open_pdf_bundle != bundle_path:
+        close_pdf_bundle(canvas)
+        canvas.Print(f"{bundle_path}[")
+        _open_pdf_bundle = bundle_path
+    canvas.Print(bundle_path, f"Title:{canvas_name}")
+
+
+def close_pdf_bundle(canvas=None):
+    """Write the trailer of the open 'pdf-bundle' file, if any."""
+    global _open_pdf_bundle
+    if _open_pdf_bundle is None:
+        return
+    if canvas is None:
+        import ROOT
+        canvas = ROOT.TCanvas("c_pdf_bundle_close", "", 10, 10)
+    canvas.Print(f"{_open_pdf_bundle}]")
+    _open_pdf_bundle = None
+
+
 def save_canvas(canvas, output_format, f_out=None, output_dir=None, subdir_path="", canvas_name=None, save_hists=False):
     """
     Save canvas in the specified format.
     For ROOT: writes to ROOT file in current directory
     For PDF/PNG: saves to output_dir with subdir_path structure
+    For pdf-bundle: appends a page to one multi-page PDF per region folder
     If save_hists=True (ROOT format only), also writes each histogram as a
     standalone object alongside the canvas.
     """
@@ -193,6 +247,12 @@ def save_canvas(canvas, output_format, f_out=None, output_dir=None, subdir_path=
             canvas.Write()
             if save_hists:
                 _write_hists_from_pad(canvas)
+    elif output_format == 'pdf-bundle':
+        folder = subdir_path.split('/')[0] if subdir_path else ""
+        bundle_dir = Path(output_dir) / folder if folder else Path(output_dir)
+        bundle_dir.mkdir(parents=True, exist_ok=True)
+        bundle_path = bundle_dir / f"{folder or 'plots'}.pdf"
+        _print_to_pdf_bundle(canvas, str(bundle_path), canvas_name or canvas.GetName())
     else:
         # Create subdirectory structure for PDF/PNG
         save_dir = Path(output_dir) / subdir_path if subdir_path else Path(output_dir)
@@ -283,7 +343,10 @@ def parse_arguments():
     parser.add_argument('--isr-pt-cut', type=float, default=None,
                        help='Minimum pT(ISR) cut in GeV (compressed mode only). Default: 700 when compressed mode is used.')
     parser.add_argument('--workers', type=int, default=1,
-                       help='Number of parallel worker processes for file loading (default: 1)')
+                       help='Number of parallel workers for file loading (default: 1)')
+    parser.add_argument('--worker-type', choices=['process', 'thread'], default='process',
+                       help='Parallel loading backend: process (default) or thread. Threads avoid '
+                            'pickling results back and suit I/O-bound remote (root://) inputs')
     parser.add_argument('--verbose', action='store_true', default=False,
                        help='Print per-file loading details (entries, cuts, RSS)')
     parser.add_argument('--lumi', type=float, default=400.0, help='Integrated luminosity in fb^-1 (default: 400)')
@@ -302,8 +365,9 @@ def parse_arguments():
                        help='YAML config file specifying input files and optional run parameters')
 
     # Output Format Options
-    parser.add_argument('--format', choices=['root', 'pdf', 'png', 'eps'], default='root',
-                       help='Output format: root (default), pdf, png, or eps')
+    parser.add_argument('--format', choices=['root', 'pdf', 'png', 'eps', 'pdf-bundle'], default='root',
+                       help='Output format: root (default), pdf, png, eps, or pdf-bundle '
+                            '(one multi-page PDF per region)')
     parser.add_argument('--save-hists', action='store_true', default=False,
                        help='(ROOT format only) Also write individual histogram objects alongside canvases')
     parser.add_argument('--no-merge-qcd-gjets', action='store_true', default=False,
@@ -314,6 +378,21 @@ def parse_arguments():
 def main():
     args = parse_arguments()
 
+    import ROOT
+    # No interactive graphics are ever needed: go to batch mode before the
+    # first canvas is created, and keep histograms out of gDirectory (every
+    # plotted histogram is written explicitly, never looked up by name).
+    # Every plotted histogram is weighted, so store per-bin weight sums by default.
+    ROOT.gROOT.SetBatch(True)
+    ROOT.gStyle.SetOptStat(0)
+    ROOT.TH1.AddDirectory(False)
+    ROOT.TH1.SetDefaultSumw2(True)
+    from src.style import StyleManager, _CMS_AVAILABLE
+    from src.loader import DataLoader
+    from src.plotter import Plotter1D, Plotter2D, PlotterDataMC
+    if not _CMS_AVAILABLE:
+        print("Warning: cmsstyle not available, using built-in fallback style.")
+
     # Load YAML input config if provided
     bg_groups = None
     data_groups = None
@@ -386,6 +465,13 @@ def main():
     output_formats = args.format
     output_path = args.output
 
+    # The open pdf-bundle holds ROOT's single PostScript/PDF stream (gVirtualPS);
+    # single-file pdf/eps saves would reuse and close it mid-bundle
+    clashing = [f for f in ('pdf', 'eps') if f in output_formats]
+    if 'pdf-bundle' in output_formats and clashing:
+        print(f"Error: --format pdf-bundle cannot be combined with {', '.join(clashing)}")
+        sys.exit(1)
+
     use_root_file = 'root' in output_formats
     non_root_formats = [f for f in output_formats if f != 'root']
 
@@ -411,7 +497,8 @@ def main():
 
     loader = DataLoader(args.tree, luminosity=args.lumi,
                        analysis_mode=analysis_mode, isr_pt_cut=isr_pt_cut,
-                       n_workers=args.workers, verbose=args.verbose)
+                       n_workers=args.workers, verbose=args.verbose,
+                       worker_type=args.worker_type)
     plotter1d = Plotter1D(style)
     plotter2d = Plotter2D(style)
     plotter_datamc = PlotterDataMC(style)
@@ -441,18 +528,15 @@ def main():
     
     print(f"Loading data for {len(event_flags)} event flags and {len(custom_cuts)} custom cuts...")
     
-    # Load each category once (background files deduplicated across groups)
-    sig_flat_map, custom_sig_flat_map = loader.load_data_unified(signal_files, event_flags, custom_cuts)
-    sig_data_map = assemble_grouped_map(sig_flat_map, signal_groups, loader.combine_data)
-    custom_sig_data_map = assemble_grouped_map(custom_sig_flat_map, signal_groups, loader.combine_data)
-    bg_flat_map, custom_bg_flat_map = loader.load_data_unified(all_bg_files, event_flags, custom_cuts)
-
     # Load data files if provided.
     # --data-flag can be either an event flag ("pass...") or a custom cut string.
     # We fold it into the appropriate list so everything loads in one pass.
-    data_flat_map, custom_data_flat_map = {}, {}
     data_flag_is_event = args.data_flag and is_event_flag(args.data_flag)
     data_flag_key = None   # key used to retrieve cr_data_collection later
+    load_requests = [
+        (signal_files, event_flags, custom_cuts, False),
+        (all_bg_files, event_flags, custom_cuts, False),  # deduplicated across groups
+    ]
     if all_data_files:
         data_event_flags = event_flags.copy()
         data_custom_cuts = [c for c, b in zip(custom_cuts, custom_blind_cuts) if not b]
@@ -464,9 +548,19 @@ def main():
             else:
                 data_custom_cuts.append(args.data_flag)
                 data_flag_key = f'CustomRegion{len(data_custom_cuts)}'  # key in custom_data_flat_map
-        data_flat_map, custom_data_flat_map = loader.load_data_unified(
-            all_data_files, data_event_flags, data_custom_cuts, is_data=True
-        )
+        load_requests.append((all_data_files, data_event_flags, data_custom_cuts, True))
+
+    # Load every category once, sharing one worker pool across them.
+    # Inputs are not read again after this, so release the file handles.
+    try:
+        loaded = loader.load_all(load_requests)
+    finally:
+        loader.close_all()
+    sig_flat_map, custom_sig_flat_map = loaded[0]
+    bg_flat_map, custom_bg_flat_map = loaded[1]
+    data_flat_map, custom_data_flat_map = loaded[2] if all_data_files else ({}, {})
+    sig_data_map = assemble_grouped_map(sig_flat_map, signal_groups, loader.combine_data)
+    custom_sig_data_map = assemble_grouped_map(custom_sig_flat_map, signal_groups, loader.combine_data)
 
     # Assemble grouped maps (combines files within each group where combine=True)
     bg_data_map = assemble_grouped_map(bg_flat_map, bg_groups, loader.combine_data)
@@ -479,7 +573,10 @@ def main():
     
     # Output File (only when root format requested)
     if use_root_file:
-        f_out = ROOT.TFile(root_output_path, "RECREATE")
+        # LZ4 writes/reads the canvas blobs much faster than the ZLIB default
+        # at a comparable file size
+        f_out = ROOT.TFile(root_output_path, "RECREATE", "",
+                           ROOT.CompressionSettings(ROOT.RCompressionSetting.EAlgorithm.kLZ4, 4))
         _write_palette_setup(f_out)
     else:
         f_out = None
@@ -493,6 +590,10 @@ def main():
                               f_out if fmt == 'root' else None,
                               output_dir,
                               subdir, cname, save_hists=args.save_hists)
+        # Every plot gets its own canvas; once it is written out, drop it from
+        # gROOT's list of canvases so that list (and the lookups ROOT does on it
+        # for each new canvas) doesn't grow with the number of plots.
+        canvas.Close()
 
     # Combine both event flags and custom cuts into one processing loop
     all_flags_and_cuts = []
@@ -538,6 +639,19 @@ def main():
             'blind_data': custom_blind_cuts[i] if i < len(custom_blind_cuts) else False,
         })
     
+    # Plot specs (short name, label, bins, range) depend only on the variable,
+    # so resolve them once here instead of per flag and plot type
+    plot_specs = AnalysisConfig.PLOT_SPECS
+    var_specs_1d = []
+    for var_key in args.vars:
+        if var_key not in plot_specs:
+            print(f"Warning: Variable {var_key} not defined in config. Skipping.")
+            continue
+        var_specs_1d.append(plot_specs[var_key])
+    # Data CR cannot provide MC-only variables
+    var_specs_cr = [plot_specs[var_key] for var_key in args.vars
+                    if var_key in plot_specs and var_key not in AnalysisConfig.MC_ONLY]
+
     # Process all flags and cuts uniformly
     for item in all_flags_and_cuts:
         flag = item['name']
@@ -618,93 +732,65 @@ def main():
                 blind_data = is_signal_region(flag) or item.get('blind_data', False)
             
             # Determine variable set based on final state (like datamc_batch_process.py)
-            datamc_vars = []
-            
             # Event-level variables differ by analysis mode
             if analysis_mode == AnalysisMode.COMPRESSED:
-                event_level_vars = ['rjrIsr_RIsr', 'rjrIsr_PtIsr']
+                datamc_vars = EVENT_VARS_COMPRESSED
             else:
-                event_level_vars = ['rjr_Ms', 'rjr_Rs', 'selCMet']
-            datamc_vars.extend(event_level_vars)
-            
+                datamc_vars = EVENT_VARS
+
             if region_type == 'sv':
-                hadSV_vars = ['HadronicSV_mass', 'HadronicSV_dxy', 'HadronicSV_dxySig',
-                              'HadronicSV_pOverE', 'HadronicSV_decayAngle', 'HadronicSV_cosTheta',
-                              'HadronicSV_nTracks']
-                lepSV_vars = ['LeptonicSV_mass', 'LeptonicSV_dxy', 'LeptonicSV_dxySig',
-                              'LeptonicSV_pOverE', 'LeptonicSV_decayAngle', 'LeptonicSV_cosTheta']
-                # For event flags, only include the relevant SV flavor(s)
                 if item['data_source'] == 'event_flag':
-                    if "NHad" in flag and "NLep" not in flag:
-                        datamc_vars.extend(hadSV_vars)
-                    elif "NLep" in flag and "NHad" not in flag:
-                        datamc_vars.extend(lepSV_vars)
-                    else:
-                        datamc_vars.extend(hadSV_vars + lepSV_vars)
+                    datamc_vars += SV_VARS_BY_FLAVOR[("NHad" in flag, "NLep" in flag)]
                 else:
-                    datamc_vars.extend(hadSV_vars + lepSV_vars)
+                    datamc_vars += HADSV_VARS + LEPSV_VARS
             elif region_type == 'pho':
-                # mc_only variables (Gen-level) excluded — not present in data files
-                photon_vars = [
-                    v for v, c in AnalysisConfig.VARIABLES.items()
-                    if v.startswith('baseLinePhoton_') and not c.get('mc_only', False)
-                ]
-                datamc_vars.extend(photon_vars)
-            
-            for var_key in datamc_vars:
-                conf = AnalysisConfig.VARIABLES.get(var_key)
-                if not conf:
+                datamc_vars += PHOTON_VARS
+
+            datamc_specs = [plot_specs[var_key] for var_key in datamc_vars if var_key in plot_specs]
+
+            if args.normalize:
+                print("  Generating Normalized Data/MC Comparison Plots...")
+                datamc_norm_subdir = f"{folder_name}/datamc_plots_norm"
+                if use_root_file:
+                    fs_dir.cd()
+                    datamc_norm_dir = fs_dir.mkdir("datamc_plots_norm")
+
+            # Fill each variable's histograms once; the normalized version
+            # (--normalize) is drawn from rescaled copies of the same fill
+            for short_name, label, nbins, xmin, xmax in datamc_specs:
+                if not current_bg_data:  # At least need MC backgrounds
                     continue
-                
-                short_name = conf['name']
-                label = conf['label']
-                nbins = conf['bins']
-                xmin, xmax = conf['range']
-                
+                datamc_hists = plotter_datamc.build_data_mc_histograms(
+                    current_data_data, current_bg_data, short_name,
+                    nbins, xmin, xmax, blind_data=blind_data
+                )
+
                 # Create data/MC comparison plot
-                if current_bg_data:  # At least need MC backgrounds
-                    canvas = plotter_datamc.create_data_mc_comparison(
+                if use_root_file:
+                    datamc_dir.cd()
+                canvas = plotter_datamc.create_data_mc_comparison(
+                    current_data_data, current_bg_data, short_name, label, 
+                    nbins, xmin, xmax, blind_data=blind_data, 
+                    final_state_label=fs_label_latex, suffix=flag,
+                    histograms=datamc_hists
+                )
+                save_canvas(canvas, output_format, f_out, output_dir, datamc_subdir)
+
+                # Create normalized data/MC comparison plot
+                if args.normalize:
+                    if use_root_file:
+                        datamc_norm_dir.cd()
+                    canvas_norm = plotter_datamc.create_data_mc_comparison(
                         current_data_data, current_bg_data, short_name, label, 
                         nbins, xmin, xmax, blind_data=blind_data, 
-                        final_state_label=fs_label_latex, suffix=flag
+                        final_state_label=fs_label_latex, suffix=flag, normalized=True,
+                        histograms=datamc_hists
                     )
-                    save_canvas(canvas, output_format, f_out, output_dir, datamc_subdir)
+                    save_canvas(canvas_norm, output_format, f_out, output_dir, datamc_norm_subdir)
             
             # Return to parent directory
             if use_root_file:
                 fs_dir.cd()
-                
-            # Generate normalized versions if --normalize is specified
-            if args.normalize:
-                print("  Generating Normalized Data/MC Comparison Plots...")
-                datamc_norm_subdir = f"{folder_name}/datamc_plots_norm"
-                
-                if use_root_file:
-                    datamc_norm_dir = fs_dir.mkdir("datamc_plots_norm")
-                    datamc_norm_dir.cd()
-                
-                for var_key in datamc_vars:
-                    conf = AnalysisConfig.VARIABLES.get(var_key)
-                    if not conf:
-                        continue
-                    
-                    short_name = conf['name']
-                    label = conf['label']
-                    nbins = conf['bins']
-                    xmin, xmax = conf['range']
-                    
-                    # Create normalized data/MC comparison plot
-                    if current_bg_data:  # At least need MC backgrounds
-                        canvas_norm = plotter_datamc.create_data_mc_comparison(
-                            current_data_data, current_bg_data, short_name, label, 
-                            nbins, xmin, xmax, blind_data=blind_data, 
-                            final_state_label=fs_label_latex, suffix=flag, normalized=True
-                        )
-                        save_canvas(canvas_norm, output_format, f_out, output_dir, datamc_norm_subdir)
-                
-                # Return to parent directory
-                if use_root_file:
-                    fs_dir.cd()
         
         # --- Unrolled Plots ---
         if ('unrolled' in args.plots or 'all' in args.plots) and current_bg_data:
@@ -775,77 +861,55 @@ def main():
             # Get 2D plot configurations from mode config
             plot_2d_configs = mode_config['plot_2d_configs']
 
+            # Sample labels and file stems depend only on the file, so build
+            # them once rather than for every plot configuration
+            sig_2d_inputs = [(data, parse_signal_name(fname), Path(fname).stem)
+                             for fname, data in current_sig_data.items()]
+            bg_2d_inputs = [(data, parse_background_name(fname), Path(fname).stem)
+                            for fname, data in current_bg_data.items()]
+
+            # Data 2D — two independent sources, each producing its own canvas:
+            # 1. Current flag (CR only): data loaded under the same flag as signal/bg
+            # 2. --data-flag CR collection (if provided and different from current flag)
+            # Each collection is combined across files once, not per plot configuration.
+            data_2d_cases = []
+            if current_data_data and not (is_signal_region(flag) or item.get('blind_data', False)):
+                data_2d_cases.append((
+                    loader.combine_data(current_data_data), fs_label_latex,
+                    f"data_2d_{flag}"
+                ))
+            if cr_data_collection and args.data_flag != flag:
+                cr_region_label = (resolver.format_sv_label(args.data_flag)
+                                   if data_flag_is_event else f"Region: {args.data_flag}")
+                data_2d_cases.append((
+                    loader.combine_data(cr_data_collection), cr_region_label,
+                    f"data_2d_{args.data_flag}"
+                ))
+
             for plot_config in plot_2d_configs:
                 x_var = plot_config['x_var']
                 y_var = plot_config['y_var']
                 suffix = plot_config['suffix']
 
-                # Signal 2D
-                for fname, data in current_sig_data.items():
-                    sig_name = parse_signal_name(fname)
-                    sample_label_x_pos = 0.32  # Original logic for signal
-                    canvas, _ = plotter2d.plot_2d(
-                        data, f"sig_2d_{Path(fname).stem}_{flag}_{suffix}",
-                        sig_name, fs_label_latex,
-                        sample_label_x_pos=sample_label_x_pos,
-                        x_var=x_var, y_var=y_var
-                    )
-                    if canvas:
-                        save_canvas(canvas, output_format, f_out, output_dir, plots_2d_subdir)
-
-                # Background 2D (Individual)
-                for fname, data in current_bg_data.items():
-                    bg_name = parse_background_name(fname)
-                    # Original logic for individual background
-                    sample_label_x_pos = 0.62 if "QCD" in bg_name else 0.69
-                    canvas, _ = plotter2d.plot_2d(
-                        data, f"bg_2d_{Path(fname).stem}_{flag}_{suffix}",
-                        bg_name, fs_label_latex,
-                        sample_label_x_pos=sample_label_x_pos,
-                        x_var=x_var, y_var=y_var
-                    )
-                    if canvas:
-                        save_canvas(canvas, output_format, f_out, output_dir, plots_2d_subdir)
-
+                # Signal 2D (original label position for signal)
+                sim_2d_inputs = [(data, f"sig_2d_{stem}_{flag}_{suffix}", sig_name, fs_label_latex, 0.32)
+                                 for data, sig_name, stem in sig_2d_inputs]
+                # Background 2D (Individual) - original label positions
+                sim_2d_inputs += [(data, f"bg_2d_{stem}_{flag}_{suffix}", bg_name, fs_label_latex,
+                                   0.62 if "QCD" in bg_name else 0.69)
+                                  for data, bg_name, stem in bg_2d_inputs]
                 # Background 2D (Combined)
                 if current_bg_combined:
-                    sample_label_x_pos = 0.59  # Original logic for combined background
-                    canvas, _ = plotter2d.plot_2d(
-                        current_bg_combined, f"bg_2d_total_{flag}_{suffix}",
-                        "Total Background", fs_label_latex,
-                        sample_label_x_pos=sample_label_x_pos,
-                        x_var=x_var, y_var=y_var
-                    )
-                    if canvas:
-                        save_canvas(canvas, output_format, f_out, output_dir, plots_2d_subdir)
-
-                # Data 2D — two independent sources, each producing its own canvas:
-                # 1. Current flag (CR only): data loaded under the same flag as signal/bg
-                # 2. --data-flag CR collection (if provided and different from current flag)
-                data_2d_cases = []
-                if current_data_data and not (is_signal_region(flag) or item.get('blind_data', False)):
-                    data_2d_cases.append((
-                        current_data_data, fs_label_latex,
-                        f"data_2d_{flag}_{suffix}"
-                    ))
-                if cr_data_collection and args.data_flag != flag:
-                    cr_region_label = (resolver.format_sv_label(args.data_flag)
-                                       if data_flag_is_event else f"Region: {args.data_flag}")
-                    data_2d_cases.append((
-                        cr_data_collection, cr_region_label,
-                        f"data_2d_{args.data_flag}_{suffix}"
-                    ))
-                for data_coll, region_label, canvas_name in data_2d_cases:
-                    combined = loader.combine_data(data_coll)
-                    if combined:
-                        canvas, _ = plotter2d.plot_2d(
-                            combined, canvas_name,
-                            "Data", region_label,
-                            sample_label_x_pos=0.59,
-                            x_var=x_var, y_var=y_var, is_data=True
-                        )
-                        if canvas:
-                            save_canvas(canvas, output_format, f_out, output_dir, plots_2d_subdir)
+                    sim_2d_inputs.append((current_bg_combined, f"bg_2d_total_{flag}_{suffix}",
+                                          "Total Background", fs_label_latex, 0.59))
+                for canvas, _ in plotter2d.plot_many(sim_2d_inputs, x_var=x_var, y_var=y_var):
+                    save_canvas(canvas, output_format, f_out, output_dir, plots_2d_subdir)
+
+                # Data 2D (data collections combined once per flag above)
+                data_2d_inputs = [(combined, f"{canvas_prefix}_{suffix}", "Data", region_label, 0.59)
+                                  for combined, region_label, canvas_prefix in data_2d_cases if combined]
+                for canvas, _ in plotter2d.plot_many(data_2d_inputs, x_var=x_var, y_var=y_var, is_data=True):
+                    save_canvas(canvas, output_format, f_out, output_dir, plots_2d_subdir)
 
             # Return to parent directory
             if use_root_file:
@@ -860,17 +924,7 @@ def main():
                 plots_1d_dir = fs_dir.mkdir("1D_plots")
                 plots_1d_dir.cd()
             
-            for var_key in args.vars:
-                conf = AnalysisConfig.VARIABLES.get(var_key)
-                if not conf:
-                    print(f"Warning: Variable {var_key} not defined in config. Skipping.")
-                    continue
-                
-                short_name = conf['name']
-                label = conf['label']
-                nbins = conf['bins']
-                xmin, xmax = conf['range']
-                
+            for short_name, label, nbins, xmin, xmax in var_specs_1d:
                 # 1. All Signals
                 if current_sig_data:
                     c_sig = plotter1d.plot_collection(current_sig_data, short_name, label, nbins, xmin, xmax, collection_type="Signal", normalized=args.normalize, suffix=flag, final_state_label=fs_label_latex)
@@ -906,18 +960,7 @@ def main():
                     cr_sig_dir = fs_dir.mkdir("cr_vs_sr_plots")
                     cr_sig_dir.cd()
 
-                for var_key in args.vars:
-                    conf = AnalysisConfig.VARIABLES.get(var_key)
-                    if not conf:
-                        continue
-                    # Skip MC-only variables — data CR cannot provide them
-                    if conf.get('mc_only', False):
-                        continue
-                    short_name = conf['name']
-                    label = conf['label']
-                    nbins = conf['bins']
-                    xmin, xmax = conf['range']
-
+                for short_name, label, nbins, xmin, xmax in var_specs_cr:
                     canvas = plotter1d.plot_cr_data_vs_sr_signal(
                         cr_data_collection, current_sig_data,
                         short_name, label, nbins, xmin, xmax,
@@ -930,6 +973,7 @@ def main():
                     fs_dir.cd()
 
 
+    close_pdf_bundle()
     if use_root_file:
         f_out.Close()
         print(f"\nDone! Plots saved to {root_output_path}")
@@ -938,4 +982,9 @@ def main():
         print(f"Done! Plots saved to {output_dir}/ ({fmts})")
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        # Write the trailer of an open pdf-bundle even if plotting raised,
+        # so the pages written so far still form a valid PDF
+        close_pdf_bundle()
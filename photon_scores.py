@@ -1,9 +1,89 @@
 import ROOT
+import hashlib
 import os
-from src.plotter import Plotter1D, Plotter2D
+import subprocess
+from src.plotter import Plotter1D, Plotter2D, normalize_hist
 from src.style import StyleManager
 import cmsstyle as CMS
 
+#local disk buffer for asynchronously prefetched remote baskets
+PREFETCH_CACHE_DIR = "/tmp/rdf_cache"
+#eta-time binning shared by the 2D bookings and their canvas frames
+ETATIME_BINS = 50
+TIME_RANGE_PREDBH = (-20, 20)
+TIME_RANGE_PREDPB = (-20, -2)
+ETA_RANGE = (-1.5, 1.5)
+#local skim of the projected photon columns, reused on reruns with the same inputs
+#and selection (see skim_path)
+SKIM_PREFIX = "photon_skim"
+SKIM_TREE = "photon_skim"
+SKIM_COLUMNS = ["bhScore_trueBH", "bhScore_trueGJetsCR", "selPhoEta", "selPhoWTime", "mask_predBH", "mask_predPB"]
+#photon selection masks, defined once and shared by the columns that use them
+SKIM_MASKS = [("mask_trueBH","selPho_beamHaloCR == 1"),
+	("mask_trueGJets","selPho_GJetsCR == 1"),
+	("mask_predBH","selPho_beamHaloCNNScore > kBHScoreCut"),
+	("mask_predPB","selPho_physBkgCNNScore > kPBScoreCut")]
+#skip events with no photon entering any of the histograms
+SKIM_FILTER = ("ROOT::VecOps::Any(mask_trueBH) || ROOT::VecOps::Any(mask_trueGJets) || ROOT::VecOps::Any(mask_predBH) || ROOT::VecOps::Any(mask_predPB)", "anySelectedPhoton")
+SKIM_PICKS = [("bhScore_trueBH","pick_masked(selPho_beamHaloCNNScore, mask_trueBH)"),
+	("bhScore_trueGJetsCR","pick_masked(selPho_beamHaloCNNScore, mask_trueGJets)")]
+#working points of the beam halo and physics background CNN scores
+BH_SCORE_CUT = 0.917252
+PB_SCORE_CUT = 0.81476355
+#the working points as compile-time constants for the Define expressions
+SCORE_CUTS_CPP = f"""
+constexpr double kBHScoreCut = {BH_SCORE_CUT!r};
+constexpr double kPBScoreCut = {PB_SCORE_CUT!r};
+"""
+#selects x[m] into a per-thread scratch buffer; the Define copies the result into
+#its own (reused) storage, so no RVec is allocated per event after warm-up
+PICK_MASKED_CPP = """
+template <typename T, typename M>
+const ROOT::RVec<T>& pick_masked(const ROOT::RVec<T>& x, const ROOT::RVec<M>& m)
+{
+	thread_local ROOT::RVec<T> buf;
+	buf.clear();
+	buf.reserve(x.size());
+	for (std::size_t i = 0; i < x.size(); ++i)
+		if (m[i]) buf.push_back(x[i]);
+	return buf;
+}
+"""
+#Dask scheduler address (e.g. tcp://host:8786) to run the event loop as a distributed
+#RDataFrame over the input files; unset runs locally
+DASK_SCHEDULER = os.getenv("LLP_DASK_SCHEDULER")
+
+#local directory (e.g. node-local scratch) to xrdcp the remote inputs into before
+#a local run; files already staged there are reused. unset reads them over xrootd
+STAGE_DIR = os.getenv("LLP_STAGE_DIR")
+
+#skim file name keyed on everything that determines its contents (inputs, selection,
+#score cuts, columns), so a stale skim is never picked up after any of them change
+def skim_path(files):
+	key = repr((sorted(files), SKIM_MASKS, SKIM_FILTER, SKIM_PICKS, SKIM_COLUMNS, BH_SCORE_CUT, PB_SCORE_CUT))
+	return f"{SKIM_PREFIX}_{hashlib.sha1(key.encode()).hexdigest()[:12]}.root"
+
+#copies the remote files into stage_dir (all transfers concurrently) and returns the local paths
+def stage_inputs(files, stage_dir):
+	os.makedirs(stage_dir, exist_ok=True)
+	local_files = [os.path.join(stage_dir, os.path.basename(file)) for file in files]
+	procs = []
+	for file, local in zip(files, local_files):
+		if os.path.exists(local):
+			continue
+		#copy to a temporary name so an interrupted transfer is never mistaken for a staged file
+		procs.append((subprocess.Popen(["xrdcp", "-s", "-f", file, local+".part"]), local))
+	for proc, local in procs:
+		if proc.wait() != 0:
+			raise RuntimeError(f"xrdcp failed for {local}")
+		os.replace(local+".part", local)
+	return local_files
+
+#declares the C++ helpers used by the Defines (also run on each Dask worker)
+def declare_helpers():
+	ROOT.gInterpreter.Declare(SCORE_CUTS_CPP)
+	ROOT.gInterpreter.Declare(PICK_MASKED_CPP)
+
 def format_hist(hist, color, style = 1, normalize = False):
 	hist.SetLineColor(color)
 	hist.SetLineStyle(style)
@@ -11,8 +91,8 @@ def format_hist(hist, color, style = 1, normalize = False):
 	hist.SetFillColor(color)
 	hist.SetFillStyle(3003)
 	hist.SetStats(0)
-	if normalize and hist.Integral() > 0:
-		hist.Scale(1.0 / hist.Integral())
+	if normalize:
+		normalize_hist(hist)
 
 
 #for plotting per-object (photon) observables
@@ -25,42 +105,97 @@ def main():
 	plotter2d = Plotter2D(style)
 	sample_label = "MET 2018"
 	sample_label_x_pos = 0.69
-	plot_format = ".png"	
+	#vector output: much faster to write than rasterizing the colz plots to png
+	plot_format = ".pdf"
 	
 	#processing data
 	eosdir = "root://cmseos.fnal.gov//store/user/lpcsusylep/malazaro/KUCMSSkims/skims_v45/"
 	files_2018 = ["MET_R18_SVIPM100_v31_MET_AOD_Run2018B_rjrskim_v45.root","MET_R18_SVIPM100_v31_MET_AOD_Run2018A_rjrskim_v45.root","MET_R18_SVIPM100_v31_MET_AOD_Run2018C_rjrskim_v45.root","MET_R18_SVIPM100_v31_MET_AOD_Run2018D_rjrskim_v45.root"]
 	files = files_2018
 	files = [eosdir+file for file in files]
-	chain = ROOT.TChain("kuSkimTree")
-	#tchain files
-	for file in files:
-		chain.Add(file)
-	df = ROOT.RDataFrame(chain) 
+	#run the RDataFrame event loop over all cores (must be enabled before the RDataFrame is built)
+	ROOT.EnableImplicitMT(os.cpu_count())
+	#prefetch remote baskets in the background and buffer them on local disk,
+	#so the xrootd round trips overlap with processing (must be set before files are opened)
+	ROOT.gEnv.SetValue("TFile.AsyncPrefetching", 1)
+	ROOT.gEnv.SetValue("Cache.Directory", PREFETCH_CACHE_DIR)
+	run_graphs = ROOT.RDF.RunGraphs
+	skim_file = skim_path(files)
+	if os.path.exists(skim_file):
+		#reuse the local skim written by a previous run with the same inputs and selection
+		#instead of re-reading the remote chain
+		df_newbrs = ROOT.RDataFrame(SKIM_TREE, skim_file)
+		skim = None
+	else:
+		if DASK_SCHEDULER:
+			#distributed RDataFrame: one task per input file on the Dask cluster,
+			#partial histograms are merged on the client
+			from dask.distributed import Client
+			from ROOT.RDF.Experimental.Distributed import Dask, RunGraphs, initialize
+			initialize(declare_helpers)
+			df = Dask.RDataFrame("kuSkimTree", files, daskclient=Client(DASK_SCHEDULER), npartitions=len(files))
+			run_graphs = RunGraphs
+		else:
+			if STAGE_DIR:
+				files = stage_inputs(files, STAGE_DIR)
+			#with implicit MT the RDataFrame builds its own chain (and TTreeCache) per task,
+			#so hand it the file list rather than a pre-configured TChain
+			df = ROOT.RDataFrame("kuSkimTree", files)
+		declare_helpers()
 	
-	#plotting overlay of photon beam halo discriminant scores
-	df_newbrs = df.Define("bhScore_trueBH","selPho_beamHaloCNNScore[selPho_beamHaloCR == 1]").Define("bhScore_trueGJetsCR","selPho_beamHaloCNNScore[selPho_GJetsCR == 1]").Define("selPhoEta_predBH","selPhoEta[selPho_beamHaloCNNScore > 0.917252]").Define("selPhoWTime_predBH","selPhoWTime[selPho_beamHaloCNNScore > 0.917252]").Define("selPhoEta_predPB","selPhoEta[selPho_physBkgCNNScore > 0.81476355]").Define("selPhoWTime_predPB","selPhoWTime[selPho_physBkgCNNScore > 0.81476355]")
+		#plotting overlay of photon beam halo discriminant scores
+		df_newbrs = df
+		for name, expr in SKIM_MASKS:
+			df_newbrs = df_newbrs.Define(name, expr)
+		df_newbrs = df_newbrs.Filter(*SKIM_FILTER)
+		for name, expr in SKIM_PICKS:
+			df_newbrs = df_newbrs.Define(name, expr)
+		#write the projected columns to the local skim in the same event loop as the histograms
+		#(distributed snapshots are written per partition on the workers, so skip it there)
+		skim = None
+		if not DASK_SCHEDULER:
+			skim_opts = ROOT.RDF.RSnapshotOptions()
+			skim_opts.fLazy = True
+			skim_opts.fCompressionAlgorithm = ROOT.RCompressionSetting.EAlgorithm.kZSTD
+			skim_opts.fCompressionLevel = 5
+			#written under a temporary name and renamed once the event loop has finished,
+			#so an interrupted run never leaves a partial skim to be reused
+			skim = df_newbrs.Snapshot(SKIM_TREE, skim_file+".part", SKIM_COLUMNS, skim_opts)
 
 	#create 1d histograms	
-	h1 = df_newbrs.Histo1D(("score_trueBH","score_trueBH",50,0,1),"bhScore_trueBH")
-	color = style.get_color(0)
-	format_hist(h1, color, normalize = True)	
-	h2 = df_newbrs.Histo1D(("score_trueGJets","score_trueGJets",50,0,1),"bhScore_trueGJetsCR")
-	color = style.get_color(1)
-	format_hist(h2, color, normalize = True)
+	#both score distributions share one binning, so fill them in a single pass as the
+	#tag=0 (true BH) and tag=1 (true GJets CR) rows of one histogram and project them back out
+	df_scores = (df_newbrs.Define("bhScore_tagged","ROOT::VecOps::Concatenate(bhScore_trueBH, bhScore_trueGJetsCR)")
+		.Define("bhScore_tag","ROOT::VecOps::Concatenate(ROOT::RVec<int>(bhScore_trueBH.size(), 0), ROOT::RVec<int>(bhScore_trueGJetsCR.size(), 1))"))
+	h_scores = df_scores.Histo2D(("score_tagged","score_tagged;score;tag",50,0,1,2,0,2),"bhScore_tagged","bhScore_tag")
 
 	#create 2d histograms
-	h_bh_2d = df_newbrs.Histo2D(("etatime_predBH","etatime_predBH;time;eta",50,-20,20,50,-1.5,1.5),"selPhoWTime_predBH","selPhoEta_predBH")
-	h_pb_2d = df_newbrs.Histo2D(("etatime_predPB","etatime_predPB;time;eta",50,-20,-2,50,-1.5,1.5),"selPhoWTime_predPB","selPhoEta_predPB")
+	#fill straight from the (time, eta) photon columns with the 0/1 selection mask as the
+	#weight: one pass over both coordinates per photon, no masked copies of either column
+	#(same bin contents and errors; rejected photons only add zero-weight entries)
+	h_bh_2d = df_newbrs.Histo2D(("etatime_predBH","etatime_predBH;time;eta",ETATIME_BINS,*TIME_RANGE_PREDBH,ETATIME_BINS,*ETA_RANGE),"selPhoWTime","selPhoEta","mask_predBH")
+	h_pb_2d = df_newbrs.Histo2D(("etatime_predPB","etatime_predPB;time;eta",ETATIME_BINS,*TIME_RANGE_PREDPB,ETATIME_BINS,*ETA_RANGE),"selPhoWTime","selPhoEta","mask_predPB")
+
+	#everything is booked: run the event loop once for all results (and the lazy skim)
+	#before any histogram is touched, since the first access would otherwise trigger it
+	run_graphs([h_scores, h_bh_2d, h_pb_2d])
+	if skim is not None:
+		os.replace(skim_file+".part", skim_file)
+
+	#true BH / true GJets CR colors, shared by the score histograms and their cut lines
+	bh_color, gjets_color = style.get_color(0), style.get_color(1)
+
+	h1 = h_scores.ProjectionX("score_trueBH",1,1)
+	format_hist(h1, bh_color, normalize = True)	
+	h2 = h_scores.ProjectionX("score_trueGJets",2,2)
+	format_hist(h2, gjets_color, normalize = True)
 
 	#df.Report()
 	
 	#make 2D predicted eta-time plots
 	name = "eta_time_predBH"
-	time_min = -20
-	time_max = 20
-	eta_min = -1.5
-	eta_max = 1.5
+	time_min, time_max = TIME_RANGE_PREDBH
+	eta_min, eta_max = ETA_RANGE
 	time_label = "Photon time [ns]"
 	eta_label = "Pseudorapidity (#eta)"
 	pred_bh_canvas = CMS.cmsCanvas(name, time_min, time_max, eta_min, eta_max, time_label, eta_label, 
@@ -69,7 +204,7 @@ def main():
 	axis_labels['x'] = time_label
 	axis_labels['y'] = eta_label
 	final_state_label = ""
-	can, hist = plotter2d.plot_2d_baseFormat(h_bh_2d, pred_bh_canvas, axis_labels, sample_label, final_state_label, sample_label_x_pos=sample_label_x_pos)
+	can, hist = plotter2d.plot_2d_baseFormat(h_bh_2d, "selPhoWTime", "selPhoEta", pred_bh_canvas, axis_labels, sample_label, final_state_label, sample_label_x_pos=sample_label_x_pos)
 	can.cd()
 	hist.Draw("colz")
 	style.draw_cms_labels(prelim_str="Preliminary")#cms_x=0.16, cms_y=0.93, prelim_str="Preliminary", prelim_x=0.235, lumi_x=0.75, cms_text_size_mult=1.25)
@@ -79,10 +214,10 @@ def main():
 	#predicted pb
 	sample_label_x_pos = 0.15
 	name = "eta_time_predPB"
-	time_max = -2
+	time_min, time_max = TIME_RANGE_PREDPB
 	pred_pb_canvas = CMS.cmsCanvas(name, time_min, time_max, eta_min, eta_max, time_label, eta_label, 
                               square=False, extraSpace=0.01, iPos=0, with_z_axis=True)
-	can2, hist2 = plotter2d.plot_2d_baseFormat(h_pb_2d, pred_pb_canvas, axis_labels, sample_label, final_state_label, sample_label_x_pos=sample_label_x_pos)
+	can2, hist2 = plotter2d.plot_2d_baseFormat(h_pb_2d, "selPhoWTime", "selPhoEta", pred_pb_canvas, axis_labels, sample_label, final_state_label, sample_label_x_pos=sample_label_x_pos)
 	can2.cd()
 	hist2.Draw("colz")
 	style.draw_cms_labels(prelim_str="Preliminary")#cms_x=0.16, cms_y=0.93, prelim_str="Preliminary", prelim_x=0.235, lumi_x=0.75, cms_text_size_mult=1.25)
@@ -103,17 +238,15 @@ def main():
 	#create legend
 	legend = CMS.cmsLeg(0.55, 0.7, 0.94, 0.88, textSize=0.035)
 	#legend = CMS.cmsLeg(0.35, 0.675, 0.65, 0.874, textSize=0.035)
-	legend.AddEntry(h1.GetPtr(), "True Beam Halo", "fl")
-	legend.AddEntry(h2.GetPtr(), "True GJets CR", "fl")
+	legend.AddEntry(h1, "True Beam Halo", "fl")
+	legend.AddEntry(h2, "True GJets CR", "fl")
 
 	#create cut lines
-	line1 = ROOT.TLine(0.917252, 0, 0.917252, 1) #beam halo
-	color = style.get_color(0)
-	line1.SetLineColor(color)
+	line1 = ROOT.TLine(BH_SCORE_CUT, 0, BH_SCORE_CUT, 1) #beam halo
+	line1.SetLineColor(bh_color)
 	line1.SetLineWidth(2)
-	line2 = ROOT.TLine((1 - 0.81476355), 0, (1 - 0.81476355), 1) #phys bkg
-	color = style.get_color(1)
-	line2.SetLineColor(color)
+	line2 = ROOT.TLine((1 - PB_SCORE_CUT), 0, (1 - PB_SCORE_CUT), 1) #phys bkg
+	line2.SetLineColor(gjets_color)
 	line2.SetLineWidth(2)
 		
 	#setup hist axes
@@ -0,0 +1,17 @@
+"""
+Optional numba import shared by the compiled kernels.
+
+Kept out of src.utils so that importing the lightweight helpers (as main.py
+does before parsing arguments) never pulls in numba/llvmlite.
+"""
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        # No numba: run the kernels as plain Python
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -270,13 +270,24 @@ class AnalysisConfig:
         }
     }
 
+    # Flattened plotting table: branch -> (short name, label, bins, min, max)
+    PLOT_SPECS = {branch: (conf['name'], conf['label'], conf['bins'], *conf['range'])
+                  for branch, conf in VARIABLES.items()}
+    # Branches with no data counterpart (gen-level information)
+    MC_ONLY = frozenset(branch for branch, conf in VARIABLES.items() if conf.get('mc_only', False))
+
+    # Reverse index: short name -> (branch, config), built once at import
+    _BY_SHORT = {conf['name']: (branch, conf) for branch, conf in VARIABLES.items()}
+
     @staticmethod
     def get_var_config(short_name):
         """Helper to find config by short name (e.g. 'ms')"""
-        for branch, conf in AnalysisConfig.VARIABLES.items():
-            if conf['name'] == short_name:
-                return conf
-        return None
+        return AnalysisConfig._BY_SHORT.get(short_name, (None, None))[1]
+
+    @staticmethod
+    def get_var_branch(short_name):
+        """Helper to find the branch name by short name (e.g. 'ms' -> 'rjr_Ms')"""
+        return AnalysisConfig._BY_SHORT.get(short_name, (None, None))[0]
 
 
 class AnalysisMode:
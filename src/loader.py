@@ -1,3 +1,10 @@
+import functools
+import operator
+import os
+import re
+import threading
+from collections import OrderedDict
+
 import uproot
 import numpy as np
 try:
@@ -11,30 +18,353 @@ except ImportError:
         def __exit__(self, *a): pass
         def update(self, n=1): pass
 from src.selections import SelectionManager
+from src._numba import njit, HAVE_NUMBA as _HAVE_NUMBA
 from src.config import AnalysisConfig, AnalysisMode, ModeConfig
 
 
+# Parallel XRootD connections per remote file.  XRootDSource coalesces the
+# requested basket ranges into vector reads (kXR_readv) spread over these
+# workers instead of one round-trip per basket as with the fsspec handler.
+XROOTD_NUM_WORKERS = 8
+
+# Decompressed-array cache shared by all open files of this process.  Handles
+# are reused across load calls (DataLoader._open_file), so whole-range
+# tree.arrays() reads of the same branches -- flag pre-reads, HLT fallback --
+# are decompressed once rather than once per call.  One bounded LRU for every
+# handle keeps the total in check however many files are open; chunked
+# iterate() reads bypass it by design.
+ARRAY_CACHE_SIZE = '200 MB'
+_ARRAY_CACHE = uproot.LRUArrayCache(ARRAY_CACHE_SIZE)
+
+# Extracted variable values are stored as float32, which is ample for
+# histogramming and halves their memory; weights stay float64 so that large
+# weighted sums keep their precision.
+VALUE_DTYPE = np.float32
+
+# Chunk size for the legacy load_data() reads
+LEGACY_STEP_SIZE = '100 MB'
+
+# Threads used by uproot to decompress baskets within a single read.  One pool
+# per process, created on first use; forked workers don't inherit the parent's
+# threads, so the pool is dropped in the child after a fork.
+DECOMPRESSION_NUM_WORKERS = 4
+_decompression_pool = None
+# Loader threads (legacy reads, thread workers) may ask for the pool concurrently
+_decompression_pool_lock = threading.Lock()
+
+
+def _reset_decompression_pool():
+    global _decompression_pool, _decompression_pool_lock
+    _decompression_pool = None
+    _decompression_pool_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_decompression_pool)
+
+
+def _decompression_executor():
+    """Per-process thread pool handed to uproot for basket decompression."""
+    global _decompression_pool
+    if _decompression_pool is None:
+        with _decompression_pool_lock:
+            if _decompression_pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _decompression_pool = ThreadPoolExecutor(max_workers=DECOMPRESSION_NUM_WORKERS)
+    return _decompression_pool
+
+
+def _open_root_file(file_path):
+    """Open a ROOT file with uproot, using the XRootD vector-read source for root:// paths."""
+    if str(file_path).startswith('root://'):
+        return uproot.open(file_path,
+                           handler=uproot.source.xrootd.XRootDSource,
+                           num_workers=XROOTD_NUM_WORKERS,
+                           array_cache=_ARRAY_CACHE)
+    return uproot.open(file_path, array_cache=_ARRAY_CACHE)
+
 
 def _merge_chunks(chunks):
     """Concatenate a list of extracted_vars dicts into one."""
     if not chunks:
         return {}
+    if len(chunks) == 1:
+        # Most selections fit in one chunk; pass its arrays through without copying
+        return dict(chunks[0])
     merged = {}
     for key in chunks[0]:
         arrays = [c[key] for c in chunks if key in c and len(c[key]) > 0]
         merged[key] = np.concatenate(arrays) if arrays else np.array([])
     return merged
 
+def _parse_event_flag(fs_flag):
+    """Split an event flag expression into OR-ed groups of AND-ed flag branches.
+
+    'A+B|C' -> (('A', 'B'), ('C',))
+    """
+    return tuple(tuple(f.strip() for f in or_part.split('+'))
+                 for or_part in fs_flag.split('|'))
+
+
+# Single cut condition: 'var <op> number' ($ anchor: no trailing text ignored)
+_COND_RE = re.compile(r'(\w+)\s*(==|!=|<=|>=|<|>)\s*(\d+(?:\.\d+)?)\s*$')
+_COMPARISONS = {
+    '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '>': operator.gt,
+    '<=': operator.le, '>=': operator.ge,
+}
+
+
+def _split_respecting_parens(text, delimiter):
+    """Split text on delimiter only when not inside parentheses."""
+    parts = []
+    depth = 0
+    current = []
+    i = 0
+    while i < len(text):
+        if text[i] == '(':
+            depth += 1
+            current.append(text[i])
+            i += 1
+        elif text[i] == ')':
+            depth -= 1
+            current.append(text[i])
+            i += 1
+        elif depth == 0 and text[i:i+len(delimiter)] == delimiter:
+            parts.append(''.join(current).strip())
+            current = []
+            i += len(delimiter)
+        else:
+            current.append(text[i])
+            i += 1
+    parts.append(''.join(current).strip())
+    return parts
+
+
+def _compile_condition(condition):
+    """Compile a single condition like 'nSelPhotons==1' into variables -> mask."""
+    match = _COND_RE.match(condition)
+    if not match:
+        raise ValueError(f"Cannot parse condition: {condition}")
+
+    var_name, op, value_str = match.groups()
+    compare = _COMPARISONS[op]
+    value = float(value_str) if '.' in value_str else int(value_str)
+
+    def condition_mask(variables):
+        if var_name not in variables:
+            raise ValueError(f"Unknown variable: {var_name}")
+        return compare(variables[var_name], value)
+    return condition_mask
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_cut(cut_string):
+    """
+    Parse a custom cut string once into a function mapping the cut variables to
+    an event mask.  '||' binds looser than '&&'; '&' and '|' are accepted too.
+    """
+    cut_string = cut_string.strip()
+
+    # Strip matching outer parentheses and recurse
+    if cut_string.startswith('(') and cut_string.endswith(')'):
+        # Verify they actually match (not e.g. "(a>1) | (b>1)")
+        depth = 0
+        matched = True
+        for i, ch in enumerate(cut_string):
+            if ch == '(':
+                depth += 1
+            elif ch == ')':
+                depth -= 1
+            if depth == 0 and i < len(cut_string) - 1:
+                matched = False
+                break
+        if matched:
+            return _compile_cut(cut_string[1:-1])
+
+    # Normalize logical operators: replace '&&' with ' & ' and '||' with ' | '
+    normalized = cut_string.replace('&&', ' & ').replace('||', ' | ')
+
+    # Split on OR first (lower precedence), then on AND, respecting parentheses
+    for delimiter, combine in ((' | ', np.logical_or), (' & ', np.logical_and)):
+        parts = _split_respecting_parens(normalized, delimiter)
+        if len(parts) > 1:
+            compiled = [_compile_cut(part) for part in parts]
+
+            def combined_mask(variables):
+                return functools.reduce(combine, (c(variables) for c in compiled))
+            return combined_mask
+
+    # Single condition
+    return _compile_condition(cut_string)
+
+
+def _flag_mask(chunk, and_groups, cache):
+    """
+    Evaluate a parsed event flag on a chunk.  Per-branch masks are memoised in
+    ``cache`` so branches shared between flags (e.g. a common trigger) are
+    compared once per chunk.  Returns None if no group can be evaluated.
+    """
+    flag_mask = None
+    for sub_flags in and_groups:
+        if any(sf not in chunk for sf in sub_flags):
+            continue
+        and_mask = None
+        for sf in sub_flags:
+            sf_mask = cache.get(sf)
+            if sf_mask is None:
+                sf_mask = cache[sf] = (chunk[sf] == 1)
+            and_mask = sf_mask if and_mask is None else (and_mask & sf_mask)
+        flag_mask = and_mask if flag_mask is None else (flag_mask | and_mask)
+    return flag_mask
+
+
+def _jagged_counts(arr):
+    """Per-event element counts of a jagged branch read with library='np'."""
+    if arr.dtype == object:
+        return np.fromiter(map(len, arr), dtype=np.int64, count=len(arr))
+    return np.full(len(arr), arr.shape[1] if arr.ndim > 1 else 1, dtype=np.int64)
+
+
+def _jagged_flatten(arr):
+    """All elements of a jagged branch concatenated in event order."""
+    if arr.dtype == object:
+        return np.concatenate(arr) if len(arr) else np.array([])
+    return arr.reshape(-1)
+
+
+def _jagged_scaled(arr, counts, scale):
+    """
+    Flatten a jagged branch into one preallocated VALUE_DTYPE buffer and scale
+    it in place (a single output allocation instead of flatten + cast + scale).
+    """
+    out = np.empty(int(counts.sum()), dtype=VALUE_DTYPE)
+    if len(out):
+        if arr.dtype == object:
+            np.concatenate(arr, out=out)
+        else:
+            out[:] = arr.reshape(-1)
+        if scale != 1.0:
+            out *= scale
+    return out
+
+
+def _jagged_buffers(arr):
+    """Flat content, per-event start offsets and counts of a jagged branch."""
+    counts = _jagged_counts(arr)
+    return _jagged_flatten(arr), np.cumsum(counts) - counts, counts
+
+
+@njit(cache=True)
+def _leading_rjr_kernel(indices, ms, rs, pts, evt_wgt, pts_cut, ms_scale, rs_scale,
+                        luminosity, ms_out, rs_out, w_out):
+    """
+    Leading (M_S, R_S) and weight for each candidate event with all three rjr
+    collections non-empty and leading PTS below pts_cut.  ms/rs/pts are
+    (flat, starts, counts) buffers; returns the number of accepted events.
+    """
+    ms_flat, ms_starts, ms_counts = ms
+    rs_flat, rs_starts, rs_counts = rs
+    pts_flat, pts_starts, pts_counts = pts
+    n_accepted = 0
+    for j in range(indices.shape[0]):
+        i = indices[j]
+        if (ms_counts[i] > 0 and rs_counts[i] > 0 and pts_counts[i] > 0 and
+                pts_flat[pts_starts[i]] < pts_cut):
+            ms_out[n_accepted] = ms_flat[ms_starts[i]] * ms_scale
+            rs_out[n_accepted] = rs_flat[rs_starts[i]] * rs_scale
+            w_out[n_accepted] = evt_wgt[i] * luminosity
+            n_accepted += 1
+    return n_accepted
+
+
+def _leading_rjr_vectorized(indices, ms, rs, pts, evt_wgt, pts_cut, ms_scale, rs_scale,
+                            luminosity, ms_out, rs_out, w_out):
+    """
+    Array-at-a-time equivalent of _leading_rjr_kernel, used when numba is not
+    installed so the legacy loader never falls back to a per-event Python loop.
+    """
+    ms_flat, ms_starts, ms_counts = ms
+    rs_flat, rs_starts, rs_counts = rs
+    pts_flat, pts_starts, pts_counts = pts
+    sel = indices[(ms_counts[indices] > 0) & (rs_counts[indices] > 0) &
+                  (pts_counts[indices] > 0)]
+    sel = sel[pts_flat[pts_starts[sel]] < pts_cut]
+    n_accepted = len(sel)
+    np.multiply(ms_flat[ms_starts[sel]], ms_scale, out=ms_out[:n_accepted], casting='same_kind')
+    np.multiply(rs_flat[rs_starts[sel]], rs_scale, out=rs_out[:n_accepted], casting='same_kind')
+    np.multiply(evt_wgt[sel], luminosity, out=w_out[:n_accepted], casting='same_kind')
+    return n_accepted
+
+
+# Compiled per-event loop with numba, vectorized NumPy otherwise
+_leading_rjr = _leading_rjr_kernel if _HAVE_NUMBA else _leading_rjr_vectorized
+
+
+def _jagged_first(arr, counts):
+    """Leading element per event as float64, NaN for events with no elements."""
+    first = np.full(len(counts), np.nan)
+    has = counts > 0
+    if has.any():
+        starts = np.cumsum(counts) - counts
+        first[has] = _jagged_flatten(arr)[starts[has]]
+    return first
+
+
+def _build_variable_plan():
+    """
+    Flatten AnalysisConfig.VARIABLES into the per-variable tuples _extract_values
+    iterates over, so the config lookups and name tests happen once at import:
+    (branch, weights key, kind, collection, scale, mc_only, cross_cut).
+    cross_cut carries the paired variable's scale as a fourth element.
+    """
+    plan = []
+    for var_key, var_config in AnalysisConfig.VARIABLES.items():
+        # selPhoEta, selPhoWTime and selPho_* all share the selected-photon multiplicity
+        collection = 'selPho' if var_key.startswith('selPho') else var_key.split('_', 1)[0]
+        if var_key in ('rjr_Ms', 'rjr_Rs'):
+            kind = 'rjr'
+        elif collection in ('HadronicSV', 'LeptonicSV'):
+            kind = 'sv'
+        elif collection in ('baseLinePhoton', 'selPho'):
+            kind = 'photon'
+        elif not var_config['is_vector']:
+            kind = 'scalar'
+        else:
+            kind = None
+        cross_cut = var_config.get('cross_cut')
+        if cross_cut:
+            cross_cut = (*cross_cut, AnalysisConfig.VARIABLES[cross_cut[0]]['scale'])
+        plan.append((var_key, f'{var_key}_weights', kind, collection,
+                     var_config['scale'], var_config.get('mc_only', False), cross_cut))
+    return tuple(plan)
+
+
+_VARIABLE_PLAN = _build_variable_plan()
+
+
 class DataLoader:
     def __init__(self, tree_name='kuSkimTree', luminosity=400,
-                 analysis_mode='uncompressed', isr_pt_cut=None, n_workers=1, verbose=False):
+                 analysis_mode='uncompressed', isr_pt_cut=None, n_workers=1, verbose=False,
+                 worker_type='process'):
         self.tree_name = tree_name
         self.luminosity = luminosity
         self.analysis_mode = analysis_mode
         self.isr_pt_cut = isr_pt_cut
         self.n_workers = max(1, int(n_workers))
+        # 'process': separate interpreters, results are pickled back to the parent.
+        # 'thread':  shared memory, no pickling; suits I/O-bound remote (XRootD)
+        #            reads since uproot's decompression releases the GIL.
+        if worker_type not in ('process', 'thread'):
+            raise ValueError(f"Unknown worker_type '{worker_type}' (expected 'process' or 'thread')")
+        self.worker_type = worker_type
         self.verbose = verbose
         self.selection_manager = SelectionManager()
+        # Open uproot files, reused across load calls (see _open_file / close_all)
+        self._open_files = OrderedDict()
+        self._open_files_lock = threading.Lock()
+        # Set on the pickled copies process-pool workers receive (see __setstate__)
+        self._close_files_after_load = False
         self.loading_summary = {
             'data_types_loaded': set(),
             'event_flags': set(),
@@ -44,6 +374,62 @@ class DataLoader:
             'isr_pt_cut': isr_pt_cut
         }
 
+    # Upper bound on file handles kept open between load calls
+    _MAX_OPEN_FILES = 64
+
+    def __getstate__(self):
+        # Open files and locks can't be pickled for process-pool workers;
+        # each worker process opens its own handles.
+        state = self.__dict__.copy()
+        state['_open_files'] = OrderedDict()
+        del state['_open_files_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open_files_lock = threading.Lock()
+        # A worker's copy lives for one task and is never reused, so its
+        # handles must be closed when the file is done rather than cached
+        self._close_files_after_load = True
+
+    def _open_file(self, file_path):
+        """
+        Return an open uproot file for file_path, reusing the handle from an earlier
+        call so repeated loads of the same file skip the (remote) open and
+        streamer-info reads.  Past _MAX_OPEN_FILES the least recently used handle
+        is dropped from the cache; it is closed once no reader holds it anymore.
+        """
+        with self._open_files_lock:
+            f = self._open_files.get(file_path)
+            if f is not None:
+                self._open_files.move_to_end(file_path)
+                return f
+        f = _open_root_file(file_path)
+        with self._open_files_lock:
+            cached = self._open_files.setdefault(file_path, f)
+            self._open_files.move_to_end(file_path)
+            if len(self._open_files) > self._MAX_OPEN_FILES:
+                self._open_files.popitem(last=False)
+        if cached is not f:
+            # Another thread opened the same file meanwhile; keep its handle
+            f.close()
+        return cached
+
+    def _close_file(self, file_path):
+        """Close and forget the cached handle for file_path, if any."""
+        with self._open_files_lock:
+            f = self._open_files.pop(file_path, None)
+        if f is not None:
+            f.close()
+
+    def close_all(self):
+        """Close all cached file handles."""
+        with self._open_files_lock:
+            files = list(self._open_files.values())
+            self._open_files.clear()
+        for f in files:
+            f.close()
+
     def _track_loading(self, event_flags=None, custom_cuts=None, is_data=False, file_count=0):
         """Track what's being loaded for comprehensive summary."""
         self.loading_summary['data_types_loaded'].add('Data' if is_data else 'MC')
@@ -53,30 +439,42 @@ class DataLoader:
             self.loading_summary['custom_cuts'].update(custom_cuts)
         self.loading_summary['files_processed'] += file_count
 
-    def _get_branches_for_mode(self):
-        """Get the list of branches to load based on analysis mode."""
+    # Branches read only so that custom cuts can reference them; no plotted
+    # variable is built from them
+    _CUT_ONLY_BRANCHES = (
+        'SV_nHadronic', 'SV_nLeptonic', 'nSelPhotons',
+        'nBaseLinePhotons', 'baseLinePhoton_beamHaloCNNScore', 'baseLinePhoton_isoANNScore',
+    )
+
+    def _get_branches_for_mode(self, custom_cuts=(), is_data=False):
+        """
+        Get the list of branches to load based on analysis mode.
+        Branches nothing downstream consumes for this request are left out, since
+        uproot decompresses every branch it is asked for.
+        """
         mode_config = ModeConfig.get(self.analysis_mode)
+        cut_names = {name for cut in custom_cuts
+                     for name in re.findall(r'[A-Za-z_]\w*', cut)}
 
         # Common branches for all modes
-        base_branches = [
-            'evtFillWgt', 'SV_nHadronic', 'SV_nLeptonic', 'nSelPhotons', 'selCMet',
-            # SV variables for data/MC comparisons
-            'HadronicSV_mass', 'HadronicSV_dxy', 'HadronicSV_dxySig',
-            'HadronicSV_pOverE', 'HadronicSV_decayAngle', 'HadronicSV_cosTheta',
-            'HadronicSV_nTracks',
-            'LeptonicSV_mass', 'LeptonicSV_dxy', 'LeptonicSV_dxySig',
-            'LeptonicSV_pOverE', 'LeptonicSV_decayAngle', 'LeptonicSV_cosTheta',
-            # Photon variables (Gen branches absent in data files; handled gracefully)
-            'nBaseLinePhotons',
-            'baseLinePhoton_WTimeSig',
-            'baseLinePhoton_beamHaloCNNScore',
-            'baseLinePhoton_isoANNScore',
-            'baseLinePhoton_GenTimeSig',
-            'baseLinePhoton_GenLabTimeSig'
-        ]
+        branches = ['evtFillWgt', 'selCMet']
+        # SV variables for data/MC comparisons
+        branches += [var for var in AnalysisConfig.VARIABLES
+                     if var.startswith(('HadronicSV_', 'LeptonicSV_'))]
+        # Photon variables: extracted only in uncompressed mode, MC-only (gen) ones
+        # skipped for data; otherwise read only when a custom cut uses them
+        branches += [var for var, conf in AnalysisConfig.VARIABLES.items()
+                     if var.startswith('baseLinePhoton_') and (
+                         var in cut_names or (
+                             self.analysis_mode != AnalysisMode.COMPRESSED and
+                             not (is_data and conf.get('mc_only', False))))]
+        # Selected-photon variables (beam-halo 2D plots), extracted in uncompressed mode only
+        if self.analysis_mode != AnalysisMode.COMPRESSED:
+            branches += [var for var in AnalysisConfig.VARIABLES if var.startswith('selPho')]
+        branches += [b for b in self._CUT_ONLY_BRANCHES if b in cut_names]
 
         # Add mode-specific branches
-        branches = base_branches + mode_config['branches']
+        branches += mode_config['branches']
 
         return branches
     
@@ -117,102 +515,125 @@ class DataLoader:
         Loads data for multiple files and multiple final states.
         """
         self._track_loading(event_flags=final_state_flags, file_count=len(file_paths))
-        # branches to load
-        branches = [
-            'rjr_Ms', 'rjr_Rs', 'evtFillWgt', 'SV_nHadronic', 'SV_nLeptonic',
-            'nSelPhotons', 'selCMet', 'rjrPTS',
-            # SV variables for data/MC comparisons
-            'HadronicSV_mass', 'HadronicSV_dxy', 'HadronicSV_dxySig',
-            'HadronicSV_pOverE', 'HadronicSV_decayAngle', 'HadronicSV_cosTheta',
-            'HadronicSV_nTracks',
-            'LeptonicSV_mass', 'LeptonicSV_dxy', 'LeptonicSV_dxySig',
-            'LeptonicSV_pOverE', 'LeptonicSV_decayAngle', 'LeptonicSV_cosTheta',
-	    #Photon beam halo variables for beam halo CR
-	    'selPhoEta','selPhoWTime'	
-        ]
+        # branches to load: only what the selection and the Ms/Rs extraction read
+        branches = ['rjr_Ms', 'rjr_Rs', 'rjrPTS', 'evtFillWgt', 'selCMet']
         # Add flag branches
         branches.extend(final_state_flags)
         branches.extend(self.selection_manager.flags)
         
         all_data = {flag: {} for flag in final_state_flags}
         
-        for file_path in file_paths:
-            if self.verbose:
-                print(f"Loading {file_path}...")
-            try:
-                with uproot.open(file_path) as f:
-                    if self.tree_name not in f:
-                        print(f"  Warning: Tree {self.tree_name} not found in {file_path}")
-                        continue
-                        
-                    tree = f[self.tree_name]
-                    data = tree.arrays(branches, library='np')
-                    
-                    n_events = len(data['evtFillWgt'])
-                    base_mask = np.ones(n_events, dtype=bool)
-                    
-                    # Scalar cuts using Config
-                    base_mask &= (data['selCMet'] > AnalysisConfig.MET_CUT)
-                    base_mask &= (data['evtFillWgt'] < AnalysisConfig.EVT_WGT_CUT)
+        # Files are independent: read them on a thread pool (uproot releases the
+        # GIL while reading and decompressing) and merge in input order
+        if self.n_workers > 1 and len(file_paths) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(self.n_workers, len(file_paths))) as pool:
+                results = list(pool.map(
+                    lambda fp: self._load_legacy_file(fp, branches, final_state_flags),
+                    file_paths))
+        else:
+            results = [self._load_legacy_file(fp, branches, final_state_flags)
+                       for fp in file_paths]
+        
+        for file_path, file_data in zip(file_paths, results):
+            for fs_flag, flag_data in file_data.items():
+                all_data[fs_flag][file_path] = flag_data
+                
+        return all_data
+
+    def _load_legacy_file(self, file_path, branches, final_state_flags):
+        """Per-file body of load_data(); returns {final_state_flag: file data}."""
+        file_data = {}
+        if self.verbose:
+            print(f"Loading {file_path}...")
+        try:
+            f = self._open_file(file_path)
+            if self.tree_name not in f:
+                print(f"  Warning: Tree {self.tree_name} not found in {file_path}")
+                return file_data
                     
-                    # Flag cuts (filters)
-                    for flag in self.selection_manager.flags:
-                        if flag in data:
-                            base_mask &= (data[flag] == 1)
-                        elif flag == 'hlt_flags':
-                            # Try fallback expression for HLT flags
-                            try:
-                                hlt_mask = self._apply_hlt_fallback(tree)
-                                base_mask &= hlt_mask
-                            except Exception:
-                                print(f"  Warning: High-Level Trigger (HLT) not found")
-                        # No warning for other missing flags to keep output clean
+            tree = f[self.tree_name]
+            # Read the file in bounded chunks: each one is masked and reduced to
+            # its (Ms, Rs, weight) triplets before the next is decompressed
+            chunks = {fs_flag: [] for fs_flag in final_state_flags}
+            for data, report in tree.iterate(branches, library='np',
+                                             step_size=LEGACY_STEP_SIZE, report=True,
+                                             decompression_executor=_decompression_executor()):
+                self._reduce_legacy_chunk(tree, data, report, final_state_flags, chunks)
+            
+            for fs_flag, parts in chunks.items():
+                if parts:
+                    ms_parts, rs_parts, weight_parts = zip(*parts)
+                    file_data[fs_flag] = {
+                        'rjr_Ms': np.concatenate(ms_parts),
+                        'rjr_Rs': np.concatenate(rs_parts),
+                        'weights': np.concatenate(weight_parts)
+                    }
+
+        except Exception as e:
+            print(f"Error loading {file_path}: {e}")
+        
+        return file_data
+
+    def _reduce_legacy_chunk(self, tree, data, report, final_state_flags, chunks):
+        """Mask one chunk of a legacy read and append its leading rjr values to chunks."""
+        # Scalar cuts using Config
+        mask_parts = [data['selCMet'] > AnalysisConfig.MET_CUT,
+                      data['evtFillWgt'] < AnalysisConfig.EVT_WGT_CUT]
+            
+        # Flag cuts (filters)
+        for flag in self.selection_manager.flags:
+            if flag in data:
+                mask_parts.append(data[flag] == 1)
+            elif flag == 'hlt_flags':
+                # Try fallback expression for HLT flags
+                try:
+                    mask_parts.append(self._apply_hlt_fallback(
+                        tree, report.tree_entry_start, report.tree_entry_stop))
+                except Exception:
+                    print(f"  Warning: High-Level Trigger (HLT) not found")
+            # No warning for other missing flags to keep output clean
+            
+        # AND all cuts in one reduction instead of one in-place pass per cut
+        base_mask = np.logical_and.reduce(mask_parts)
+            
+        # Flat rjr buffers, built on first use and shared by all flags
+        rjr_buffers = None
+        for fs_flag in final_state_flags:
+            if fs_flag not in data:
+                # print(f"  Warning: Flag {fs_flag} not found in {tree.file.file_path}")
+                continue
                     
-                    for fs_flag in final_state_flags:
-                        if fs_flag not in data:
-                            # print(f"  Warning: Flag {fs_flag} not found in {file_path}")
-                            continue
-                            
-                        combined_mask = base_mask & (data[fs_flag] == 1)
-                        
-                        if np.sum(combined_mask) == 0:
-                            continue
-                            
-                        ms_values = []
-                        rs_values = []
-                        weights = []
-                        
-                        indices = np.where(combined_mask)[0]
-                        
-                        for i in indices:
-                            if (len(data['rjr_Ms'][i]) > 0 and 
-                                len(data['rjr_Rs'][i]) > 0 and 
-                                len(data['rjrPTS'][i]) > 0 and 
-                                data['rjrPTS'][i][0] < AnalysisConfig.RJR_PTS_CUT): 
-                                
-                                # Use Scaling from Config
-                                ms_val = data['rjr_Ms'][i][0] * AnalysisConfig.VARIABLES['rjr_Ms']['scale']
-                                rs_val = data['rjr_Rs'][i][0] * AnalysisConfig.VARIABLES['rjr_Rs']['scale']
-                                
-                                ms_values.append(ms_val)
-                                rs_values.append(rs_val)
-                                weights.append(data['evtFillWgt'][i] * self.luminosity)
-                        
-                        if ms_values:
-                            all_data[fs_flag][file_path] = {
-                                'rjr_Ms': np.array(ms_values),
-                                'rjr_Rs': np.array(rs_values),
-                                'weights': np.array(weights)
-                            }
-                            # print(f"    [{fs_flag}] Loaded {len(ms_values)} events")
-
-            except Exception as e:
-                print(f"Error loading {file_path}: {e}")
+            combined_mask = base_mask & (data[fs_flag] == 1)
+                
+            indices = np.flatnonzero(combined_mask)
+            if len(indices) == 0:
                 continue
+            
+            # Every passing event yields at most one entry: fill preallocated
+            # buffers and trim them to the number of accepted events
+            ms_values = np.empty(len(indices), dtype=VALUE_DTYPE)
+            rs_values = np.empty(len(indices), dtype=VALUE_DTYPE)
+            weights = np.empty(len(indices))
+            
+            if rjr_buffers is None:
+                rjr_buffers = tuple(_jagged_buffers(data[b])
+                                    for b in ('rjr_Ms', 'rjr_Rs', 'rjrPTS'))
+            # Use Scaling from Config
+            n_accepted = _leading_rjr(
+                indices, *rjr_buffers, data['evtFillWgt'],
+                AnalysisConfig.RJR_PTS_CUT,
+                AnalysisConfig.VARIABLES['rjr_Ms']['scale'],
+                AnalysisConfig.VARIABLES['rjr_Rs']['scale'],
+                self.luminosity, ms_values, rs_values, weights)
                 
-        return all_data
+            if n_accepted:
+                chunks[fs_flag].append((ms_values[:n_accepted],
+                                        rs_values[:n_accepted],
+                                        weights[:n_accepted]))
+                # print(f"    [{fs_flag}] Loaded {len(ms_values)} events")
 
-    def _apply_hlt_fallback(self, tree):
+    def _apply_hlt_fallback(self, tree, entry_start=None, entry_stop=None):
         """Apply HLT fallback using individual trigger branches."""
         try:
             # Load individual trigger branches
@@ -224,15 +645,15 @@ class DataLoader:
             ]
             
             # Load the trigger data
-            trigger_data = tree.arrays(trigger_branches, library='np')
-            
-            # Apply OR logic: any trigger passes
-            hlt_mask = np.zeros(len(trigger_data[trigger_branches[0]]), dtype=bool)
-            for branch in trigger_branches:
-                if branch in trigger_data:
-                    hlt_mask |= (trigger_data[branch] == 1)
+            trigger_data = tree.arrays(trigger_branches, library='np',
+                                       entry_start=entry_start, entry_stop=entry_stop)
             
-            return hlt_mask
+            # Apply OR logic: any trigger passes, combined in one reduction
+            fired = [trigger_data[branch] == 1 for branch in trigger_branches
+                     if branch in trigger_data]
+            if not fired:
+                return np.zeros(len(trigger_data[trigger_branches[0]]), dtype=bool)
+            return np.logical_or.reduce(fired)
             
         except Exception as e:
             raise Exception(f"HLT fallback failed: {e}")
@@ -243,37 +664,59 @@ class DataLoader:
         Args:
             is_data: If True, treat as data files (no MC scaling)
         Returns: (event_flag_data, custom_cut_data)
-        Uses self.n_workers > 1 for file-level parallelism via ProcessPoolExecutor.
+        Uses self.n_workers > 1 for file-level parallelism, with a ProcessPoolExecutor
+        or ThreadPoolExecutor depending on self.worker_type.
         """
-        self._track_loading(event_flags=event_flags, custom_cuts=custom_cuts, is_data=is_data, file_count=len(file_paths))
-        branches = self._get_branches_for_mode()
-        for flag in event_flags:
-            for or_part in flag.split('|'):
-                branches.extend(f.strip() for f in or_part.split('+'))
-        branches.extend(self.selection_manager.flags)
-
-        event_data = {flag: {} for flag in event_flags}
-        custom_data = {f"CustomRegion{i+1}": {} for i in range(len(custom_cuts))}
+        return self.load_all([(file_paths, event_flags, custom_cuts, is_data)])[0]
 
-        def _merge_result(file_path, file_event, file_custom):
+    def load_all(self, load_requests):
+        """
+        Load several file categories (e.g. signal, background and data) together.
+        Args:
+            load_requests: list of (file_paths, event_flags, custom_cuts, is_data) tuples
+        Returns: list of (event_flag_data, custom_cut_data), one per request
+        All files are scheduled on a single worker pool, so a category with only a
+        few files doesn't leave workers idle while the next category waits to start.
+        """
+        results = []
+        jobs = []  # (request index, file path, branches, event_flags, custom_cuts, is_data)
+        for file_paths, event_flags, custom_cuts, is_data in load_requests:
+            self._track_loading(event_flags=event_flags, custom_cuts=custom_cuts,
+                                is_data=is_data, file_count=len(file_paths))
+            branches = self._get_branches_for_mode(custom_cuts, is_data)
+            for flag in event_flags:
+                for sub_flags in _parse_event_flag(flag):
+                    branches.extend(sub_flags)
+            branches.extend(self.selection_manager.flags)
+
+            results.append(({flag: {} for flag in event_flags},
+                            {f"CustomRegion{i+1}": {} for i in range(len(custom_cuts))}))
+            req_idx = len(results) - 1
+            jobs.extend((req_idx, fp, branches, event_flags, custom_cuts, is_data)
+                        for fp in file_paths)
+
+        def _merge_result(req_idx, file_path, file_event, file_custom):
+            event_data, custom_data = results[req_idx]
             for flag, fdata in file_event.items():
                 event_data[flag][file_path] = fdata
             for region, fdata in file_custom.items():
                 custom_data[region][file_path] = fdata
 
-        if self.n_workers > 1 and len(file_paths) > 1:
-            from concurrent.futures import ProcessPoolExecutor, as_completed
+        if self.n_workers > 1 and len(jobs) > 1:
+            from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+            executor_cls = ThreadPoolExecutor if self.worker_type == 'thread' else ProcessPoolExecutor
             if self.verbose:
-                print(f"  Parallel loading: {len(file_paths)} files across {self.n_workers} workers")
-            with ProcessPoolExecutor(max_workers=self.n_workers) as pool:
+                print(f"  Parallel loading: {len(jobs)} files across "
+                      f"{self.n_workers} {self.worker_type} workers")
+            with executor_cls(max_workers=self.n_workers) as pool:
                 futures = {
-                    pool.submit(self._load_one_file, fp, branches, event_flags, custom_cuts, is_data): fp
-                    for fp in file_paths
+                    pool.submit(self._load_one_file, fp, branches, event_flags, custom_cuts, is_data): req_idx
+                    for req_idx, fp, branches, event_flags, custom_cuts, is_data in jobs
                 }
-                with tqdm(total=len(file_paths), unit="file", desc="Loading") as pbar:
+                with tqdm(total=len(jobs), unit="file", desc="Loading") as pbar:
                     for fut in as_completed(futures):
                         fp_done, file_event, file_custom = fut.result()
-                        _merge_result(fp_done, file_event, file_custom)
+                        _merge_result(futures[fut], fp_done, file_event, file_custom)
                         pbar.update(1)
         else:
             import gc, ctypes
@@ -285,13 +728,14 @@ class DataLoader:
                 except Exception:
                     pass
 
-            for fp in tqdm(file_paths, unit="file", desc="Loading"):
+            for req_idx, fp, branches, event_flags, custom_cuts, is_data in tqdm(
+                    jobs, unit="file", desc="Loading"):
                 file_path, file_event, file_custom = self._load_one_file(
                     fp, branches, event_flags, custom_cuts, is_data)
-                _merge_result(file_path, file_event, file_custom)
+                _merge_result(req_idx, file_path, file_event, file_custom)
                 _trim_heap()
 
-        return event_data, custom_data
+        return results
 
     # Branches we know are scalar (one value per event) and safe to push into
     # uproot's C-level cut expression.  Jagged branches cannot be used there.
@@ -313,7 +757,6 @@ class DataLoader:
         guaranteed to fail all custom cuts, so it can be dropped before entering
         Python.
         """
-        import re
 
         # Only use scalar branches that are actually present in this tree.
         scalar_branches = self._KNOWN_SCALAR_BRANCHES & set(available_branches)
@@ -327,7 +770,7 @@ class DataLoader:
         per_cut_filters = []
         for cut in custom_cuts:
             normalized = cut.replace('&&', ' & ').replace('||', ' | ')
-            or_clauses = self._split_respecting_parens(normalized, ' | ')
+            or_clauses = _split_respecting_parens(normalized, ' | ')
 
             clause_filters = []
             for clause in or_clauses:
@@ -341,6 +784,41 @@ class DataLoader:
 
         return ' | '.join(per_cut_filters) if per_cut_filters else None
 
+    # Rejected stretches shorter than this are read through rather than split
+    # into separate windows, so sparse selections don't turn into many tiny reads.
+    _WINDOW_MERGE_GAP = 10_000
+
+    def _flag_entry_windows(self, tree, available_branches, event_flags):
+        """
+        Phase 1 of the two-phase read: load only the event flag branches and
+        return the (entry_start, entry_stop) windows that contain events passing
+        at least one requested flag.  Payload branches are then read only inside
+        these windows, so baskets holding rejected events are never decompressed.
+        """
+        flag_terms = [_parse_event_flag(fs_flag) for fs_flag in event_flags]
+        flag_branches = {sf for and_groups in flag_terms for sub_flags in and_groups
+                         for sf in sub_flags}
+        flag_branches = [b for b in available_branches if b in flag_branches]
+        if not flag_branches:
+            return []
+
+        flags = tree.arrays(flag_branches, library='np')
+        keep = np.zeros(tree.num_entries, dtype=bool)
+        mask_cache = {}
+        for and_groups in flag_terms:
+            flag_mask = _flag_mask(flags, and_groups, mask_cache)
+            if flag_mask is not None:
+                keep |= flag_mask
+
+        entries = np.flatnonzero(keep)
+        if len(entries) == 0:
+            return []
+        # Start a new window wherever the gap to the next passing entry is large
+        breaks = np.flatnonzero(np.diff(entries) > self._WINDOW_MERGE_GAP)
+        starts = np.concatenate(([entries[0]], entries[breaks + 1]))
+        stops = np.concatenate((entries[breaks] + 1, [entries[-1] + 1]))
+        return list(zip(starts.tolist(), stops.tolist()))
+
     @staticmethod
     def _rss_mb():
         """Return current process RSS in MB (Linux /proc; falls back to 0)."""
@@ -363,304 +841,331 @@ class DataLoader:
         if self.verbose:
             print(f"Loading {file_path}...  [RSS {self._rss_mb():.0f} MB]")
         try:
-            with uproot.open(file_path) as f:
-                if self.tree_name not in f:
-                    print(f"  Warning: Tree {self.tree_name} not found in {file_path}")
-                    return file_path, event_result, custom_result
-
-                tree = f[self.tree_name]
-                n_entries = tree.num_entries
-                tree_keys = set(tree.keys())
-                available_branches = [b for b in branches if b in tree_keys]
-                # Warn once if requested photon branches are missing from this tree
-                _pho_requested = {'baseLinePhoton_beamHaloCNNScore', 'baseLinePhoton_WTimeSig',
-                                  'baseLinePhoton_isoANNScore', 'nBaseLinePhotons'}
-                _pho_missing = _pho_requested - tree_keys
-                if _pho_missing and custom_cuts and self.verbose:
-                    print(f"  Note: photon branch(es) absent from tree: {sorted(_pho_missing)}")
-                    print(f"  Available photon-like keys: {sorted(k for k in tree_keys if 'oto' in k or 'Pho' in k)[:10]}")
-                cut_expr = (f"(selCMet > {AnalysisConfig.MET_CUT}) &"
-                            f" (evtFillWgt < {AnalysisConfig.EVT_WGT_CUT})")
-
-                scalar_prefilter = self._build_scalar_prefilter(
-                    custom_cuts, available_branches, tree)
-                if scalar_prefilter:
-                    cut_expr = f"({cut_expr}) & ({scalar_prefilter})"
-
-                if self.analysis_mode == AnalysisMode.COMPRESSED:
-                    if (self.isr_pt_cut is not None and
-                            'rjrIsr_PtIsr' in available_branches):
-                        cut_expr += f" & (rjrIsr_PtIsr >= {self.isr_pt_cut})"
-                    if 'rjrIsr_nSVisObjects' in available_branches:
-                        cut_expr += " & (rjrIsr_nSVisObjects > 0)"
+            f = self._open_file(file_path)
+            if self.tree_name not in f:
+                print(f"  Warning: Tree {self.tree_name} not found in {file_path}")
+                return file_path, event_result, custom_result
+
+            tree = f[self.tree_name]
+            n_entries = tree.num_entries
+            tree_keys = set(tree.keys())
+            available_branches = [b for b in branches if b in tree_keys]
+            # Warn once if requested photon branches are missing from this tree
+            _pho_requested = {'baseLinePhoton_beamHaloCNNScore', 'baseLinePhoton_WTimeSig',
+                              'baseLinePhoton_isoANNScore', 'nBaseLinePhotons'}
+            _pho_missing = _pho_requested - tree_keys
+            if _pho_missing and custom_cuts and self.verbose:
+                print(f"  Note: photon branch(es) absent from tree: {sorted(_pho_missing)}")
+                print(f"  Available photon-like keys: {sorted(k for k in tree_keys if 'oto' in k or 'Pho' in k)[:10]}")
+            cut_expr = (f"(selCMet > {AnalysisConfig.MET_CUT}) &"
+                        f" (evtFillWgt < {AnalysisConfig.EVT_WGT_CUT})")
+
+            scalar_prefilter = self._build_scalar_prefilter(
+                custom_cuts, available_branches, tree)
+            if scalar_prefilter:
+                cut_expr = f"({cut_expr}) & ({scalar_prefilter})"
+
+            if self.analysis_mode == AnalysisMode.COMPRESSED:
+                if (self.isr_pt_cut is not None and
+                        'rjrIsr_PtIsr' in available_branches):
+                    cut_expr += f" & (rjrIsr_PtIsr >= {self.isr_pt_cut})"
+                if 'rjrIsr_nSVisObjects' in available_branches:
+                    cut_expr += " & (rjrIsr_nSVisObjects > 0)"
 
+            if self.verbose:
+                print(f"  tree entries: {n_entries:,}  |  uproot cut: {cut_expr}")
+
+            # Two-phase read: with only event flags requested, the flag branches
+            # alone decide which entries can pass, so read them first and limit
+            # the payload read to windows containing passing events.  Custom cuts
+            # need payload branches to evaluate, so they keep the full range.
+            if custom_cuts:
+                windows = [(0, n_entries)]
+            else:
+                windows = self._flag_entry_windows(tree, available_branches, event_flags)
                 if self.verbose:
-                    print(f"  tree entries: {n_entries:,}  |  uproot cut: {cut_expr}")
+                    n_windowed = sum(stop - start for start, stop in windows)
+                    print(f"  flag pre-read: {len(windows)} window(s) covering "
+                          f"{n_windowed:,}/{n_entries:,} entries")
+
+            def _iterate_windows():
+                for entry_start, entry_stop in windows:
+                    yield from tree.iterate(available_branches, cut=cut_expr,
+                                            library='np', step_size=CHUNK_SIZE,
+                                            entry_start=entry_start,
+                                            entry_stop=entry_stop,
+                                            decompression_executor=_decompression_executor())
+
+            flag_terms = {flag: _parse_event_flag(flag) for flag in event_flags}
+            event_chunks = {flag: [] for flag in event_flags}
+            custom_chunks = {f"CustomRegion{i+1}": [] for i in range(len(custom_cuts))}
+            flag_counts  = {flag: 0 for flag in event_flags}
+            pass_counts  = {flag: 0 for flag in event_flags}
 
-                event_chunks = {flag: [] for flag in event_flags}
-                custom_chunks = {f"CustomRegion{i+1}": [] for i in range(len(custom_cuts))}
-                flag_counts  = {flag: 0 for flag in event_flags}
-                pass_counts  = {flag: 0 for flag in event_flags}
+            import gc, ctypes
+            def _trim():
+                gc.collect()
+                try:
+                    ctypes.cdll.LoadLibrary("libc.so.6").malloc_trim(0)
+                except Exception:
+                    pass
 
-                import gc, ctypes
-                def _trim():
-                    gc.collect()
-                    try:
-                        ctypes.cdll.LoadLibrary("libc.so.6").malloc_trim(0)
-                    except Exception:
-                        pass
-
-                total_loaded = 0
-                total_base   = 0
-                custom_pass  = [0] * len(custom_cuts)
-                custom_stored_events = [0] * len(custom_cuts)
-                chunk_count  = 0
-
-                for chunk in tree.iterate(available_branches, cut=cut_expr,
-                                          library='np', step_size=CHUNK_SIZE):
-                    n_events = len(chunk['evtFillWgt'])
-                    total_loaded += n_events
-                    base_mask = np.ones(n_events, dtype=bool)
-
-                    for flag in self.selection_manager.flags:
-                        if flag in chunk:
-                            base_mask &= (chunk[flag] == 1)
-                    total_base += int(np.sum(base_mask))
-
-                    # Process event flags ('|' = OR, '+' = AND)
-                    for fs_flag in event_flags:
-                        or_parts = [p.strip() for p in fs_flag.split('|')]
-                        flag_mask = np.zeros(n_events, dtype=bool)
-                        all_missing = True
-
-                        for or_part in or_parts:
-                            sub_flags = [f.strip() for f in or_part.split('+')]
-                            if any(sf not in chunk for sf in sub_flags):
-                                continue
-                            all_missing = False
-                            and_mask = np.ones(n_events, dtype=bool)
-                            for sf in sub_flags:
-                                and_mask &= (chunk[sf] == 1)
-                            flag_mask |= and_mask
-
-                        if all_missing:
-                            continue
-
-                        combined_mask = base_mask & flag_mask
-                        flag_counts[fs_flag] += int(np.sum(flag_mask))
-                        pass_counts[fs_flag] += int(np.sum(combined_mask))
-
-                        if np.sum(combined_mask) == 0:
-                            continue
-
-                        extracted_vars = self._extract_values(chunk, combined_mask, is_data)
-                        if extracted_vars:
-                            event_chunks[fs_flag].append(extracted_vars)
-
-                    # Process custom cuts
-                    for i, custom_cut in enumerate(custom_cuts):
-                        custom_region_name = f"CustomRegion{i+1}"
-                        try:
-                            cut_variables = {
-                                'nSelPhotons': chunk.get("nSelPhotons", np.zeros(n_events)),
-                                'SV_nHadronic': chunk.get("SV_nHadronic", np.zeros(n_events)),
-                                'SV_nLeptonic': chunk.get("SV_nLeptonic", np.zeros(n_events)),
-                                'selCMet':      chunk.get("selCMet",      np.zeros(n_events)),
-                            }
-                            # Add SV object variables (jagged) as first-element scalars per event
-                            for sv_var in ['HadronicSV_dxySig', 'HadronicSV_mass', 'HadronicSV_dxy',
-                                           'HadronicSV_nTracks', 'LeptonicSV_dxySig',
-                                           'LeptonicSV_mass', 'LeptonicSV_dxy']:
-                                if sv_var in chunk:
-                                    cut_variables[sv_var] = np.array(
-                                        [float(a[0]) if len(a) > 0 else np.nan
-                                         for a in chunk[sv_var]], dtype=float)
-                            # Add photon variables (jagged) as first-element scalars per event.
-                            # Default to NaN when a branch is absent so photon cuts fail
-                            # gracefully on files produced without photon reconstruction.
-                            _nan_pho = np.full(n_events, np.nan)
-                            for pho_var in ['baseLinePhoton_beamHaloCNNScore', 'baseLinePhoton_WTimeSig',
-                                            'baseLinePhoton_isoANNScore', 'baseLinePhoton_GenTimeSig']:
-                                if pho_var in chunk:
-                                    cut_variables[pho_var] = np.array(
-                                        [float(a[0]) if len(a) > 0 else np.nan
-                                         for a in chunk[pho_var]], dtype=float)
-                                else:
-                                    cut_variables[pho_var] = _nan_pho
-                            # nBaseLinePhotons: default 0 (no photons) when branch is absent
-                            cut_variables['nBaseLinePhotons'] = chunk.get(
-                                'nBaseLinePhotons', np.zeros(n_events, dtype=np.int32))
-                            if self.analysis_mode == AnalysisMode.COMPRESSED:
-                                for isr_var in ['rjrIsr_Ms', 'rjrIsr_MsPerp', 'rjrIsr_PtIsr',
-                                               'rjrIsr_RIsr', 'rjrIsr_Rs', 'rjrIsrPTS',
-                                               'rjrIsr_nSVisObjects', 'rjrIsr_nIsrVisObjects']:
-                                    if isr_var in chunk:
-                                        cut_variables[isr_var] = chunk[isr_var]
-                            elif self.analysis_mode == AnalysisMode.UNCOMPRESSED:
-                                for unc_var in ['rjr_Ms', 'rjr_Rs', 'rjrPTS']:
-                                    if unc_var in chunk:
-                                        cut_variables[unc_var] = np.array(
-                                            [float(a[0]) if len(a) > 0 else np.nan
-                                             for a in chunk[unc_var]], dtype=float)
-                            custom_mask = self._parse_simple_cut(custom_cut, cut_variables)
-                            combined_mask = base_mask & custom_mask
-                        except Exception as e:
-                            print(f"  Warning: Failed to evaluate custom cut '{custom_cut}': {e}")
-                            continue
-
-                        n_pass = int(np.sum(combined_mask))
-                        custom_pass[i] += n_pass
-                        if n_pass == 0:
-                            continue
-                        extracted_vars = self._extract_values(chunk, combined_mask, is_data)
-                        if extracted_vars:
-                            n_stored = max((len(v) for v in extracted_vars.values()), default=0)
-                            custom_stored_events[i] += n_stored
-                            custom_chunks[custom_region_name].append(extracted_vars)
-
-                    chunk_count += 1
-                    _trim()
-
-                # Per-file summary
-                if self.verbose:
-                    print(f"  loaded {total_loaded:,} evts after uproot cut  |  "
-                          f"{total_base:,} pass base mask  |  RSS {self._rss_mb():.0f} MB")
-                    for i, cut in enumerate(custom_cuts):
-                        acc_mb = 0
-                        region = f"CustomRegion{i+1}"
-                        for chunk_vars in custom_chunks[region]:
-                            acc_mb += sum(a.nbytes for a in chunk_vars.values()) / 1e6
-                        print(f"  custom cut {i+1}: {custom_pass[i]:,} events pass cut  |  "
-                              f"{custom_stored_events[i]:,} stored entries  |  "
-                              f"accumulated {acc_mb:.1f} MB in custom_chunks")
-
-                # Merge chunks
+            total_loaded = 0
+            total_base   = 0
+            custom_pass  = [0] * len(custom_cuts)
+            custom_stored_events = [0] * len(custom_cuts)
+            chunk_count  = 0
+
+            for chunk in _iterate_windows():
+                n_events = len(chunk['evtFillWgt'])
+                total_loaded += n_events
+                flag_parts = [chunk[flag] == 1 for flag in self.selection_manager.flags
+                              if flag in chunk]
+                base_mask = (np.logical_and.reduce(flag_parts) if flag_parts
+                             else np.ones(n_events, dtype=bool))
+                total_base += np.count_nonzero(base_mask)
+
+                # Process event flags ('|' = OR, '+' = AND); each flag branch
+                # is compared once per chunk even when several flags share it
+                mask_cache = {}
                 for fs_flag in event_flags:
-                    if pass_counts[fs_flag] == 0:
-                        print(f"  Warning: 0 events pass baseline cuts for '{fs_flag}' in {file_path} "
-                              f"({flag_counts[fs_flag]} passed the flag(s) before baseline cuts)")
+                    flag_mask = _flag_mask(chunk, flag_terms[fs_flag], mask_cache)
+                    if flag_mask is None:
                         continue
-                    if not event_chunks[fs_flag]:
+
+                    combined_mask = base_mask & flag_mask
+                    n_pass = np.count_nonzero(combined_mask)
+                    flag_counts[fs_flag] += np.count_nonzero(flag_mask)
+                    pass_counts[fs_flag] += n_pass
+
+                    if n_pass == 0:
                         continue
-                    file_data = self._process_extracted_data(_merge_chunks(event_chunks[fs_flag]))
-                    if file_data:
-                        event_result[fs_flag] = file_data
-                    else:
-                        print(f"  Warning: Events passed '{fs_flag}' and baseline cuts but failed "
-                              f"mode validation in {file_path}")
-
-                for i in range(len(custom_cuts)):
-                    region = f"CustomRegion{i+1}"
-                    if not custom_chunks[region]:
+
+                    extracted_vars = self._extract_values(chunk, combined_mask, is_data)
+                    if extracted_vars:
+                        event_chunks[fs_flag].append(extracted_vars)
+
+                # Cut inputs don't depend on the cut itself: build them once per
+                # chunk, with a single shared zeros array for absent count branches
+                if custom_cuts:
+                    _zeros = np.zeros(n_events)
+                    cut_variables = {
+                        'nSelPhotons': chunk.get("nSelPhotons", _zeros),
+                        'SV_nHadronic': chunk.get("SV_nHadronic", _zeros),
+                        'SV_nLeptonic': chunk.get("SV_nLeptonic", _zeros),
+                        'selCMet':      chunk.get("selCMet",      _zeros),
+                    }
+                    # Add SV object variables (jagged) as first-element scalars per event
+                    for sv_var in ['HadronicSV_dxySig', 'HadronicSV_mass', 'HadronicSV_dxy',
+                                   'HadronicSV_nTracks', 'LeptonicSV_dxySig',
+                                   'LeptonicSV_mass', 'LeptonicSV_dxy']:
+                        if sv_var in chunk:
+                            cut_variables[sv_var] = _jagged_first(
+                                chunk[sv_var], _jagged_counts(chunk[sv_var]))
+                    # Add photon variables (jagged) as first-element scalars per event.
+                    # Default to NaN when a branch is absent so photon cuts fail
+                    # gracefully on files produced without photon reconstruction.
+                    _nan_pho = np.full(n_events, np.nan)
+                    for pho_var in ['baseLinePhoton_beamHaloCNNScore', 'baseLinePhoton_WTimeSig',
+                                    'baseLinePhoton_isoANNScore', 'baseLinePhoton_GenTimeSig']:
+                        if pho_var in chunk:
+                            cut_variables[pho_var] = _jagged_first(
+                                chunk[pho_var], _jagged_counts(chunk[pho_var]))
+                        else:
+                            cut_variables[pho_var] = _nan_pho
+                    # nBaseLinePhotons: default 0 (no photons) when branch is absent
+                    cut_variables['nBaseLinePhotons'] = chunk.get(
+                        'nBaseLinePhotons', np.zeros(n_events, dtype=np.int32))
+                    if self.analysis_mode == AnalysisMode.COMPRESSED:
+                        for isr_var in ['rjrIsr_Ms', 'rjrIsr_MsPerp', 'rjrIsr_PtIsr',
+                                       'rjrIsr_RIsr', 'rjrIsr_Rs', 'rjrIsrPTS',
+                                       'rjrIsr_nSVisObjects', 'rjrIsr_nIsrVisObjects']:
+                            if isr_var in chunk:
+                                cut_variables[isr_var] = chunk[isr_var]
+                    elif self.analysis_mode == AnalysisMode.UNCOMPRESSED:
+                        for unc_var in ['rjr_Ms', 'rjr_Rs', 'rjrPTS']:
+                            if unc_var in chunk:
+                                cut_variables[unc_var] = _jagged_first(
+                                    chunk[unc_var], _jagged_counts(chunk[unc_var]))
+
+                # Process custom cuts
+                for i, custom_cut in enumerate(custom_cuts):
+                    custom_region_name = f"CustomRegion{i+1}"
+                    try:
+                        custom_mask = self._parse_simple_cut(custom_cut, cut_variables)
+                        combined_mask = base_mask & custom_mask
+                    except Exception as e:
+                        print(f"  Warning: Failed to evaluate custom cut '{custom_cut}': {e}")
                         continue
-                    file_data = self._process_extracted_data(_merge_chunks(custom_chunks[region]))
-                    if file_data:
-                        custom_result[region] = file_data
+
+                    n_pass = np.count_nonzero(combined_mask)
+                    custom_pass[i] += n_pass
+                    if n_pass == 0:
+                        continue
+                    extracted_vars = self._extract_values(chunk, combined_mask, is_data)
+                    if extracted_vars:
+                        n_stored = max((len(v) for v in extracted_vars.values()), default=0)
+                        custom_stored_events[i] += n_stored
+                        custom_chunks[custom_region_name].append(extracted_vars)
+
+                chunk_count += 1
+                _trim()
+
+            # Per-file summary
+            if self.verbose:
+                print(f"  loaded {total_loaded:,} evts after uproot cut  |  "
+                      f"{total_base:,} pass base mask  |  RSS {self._rss_mb():.0f} MB")
+                for i, cut in enumerate(custom_cuts):
+                    acc_mb = 0
+                    region = f"CustomRegion{i+1}"
+                    for chunk_vars in custom_chunks[region]:
+                        acc_mb += sum(a.nbytes for a in chunk_vars.values()) / 1e6
+                    print(f"  custom cut {i+1}: {custom_pass[i]:,} events pass cut  |  "
+                          f"{custom_stored_events[i]:,} stored entries  |  "
+                          f"accumulated {acc_mb:.1f} MB in custom_chunks")
+
+            # Merge chunks
+            for fs_flag in event_flags:
+                if pass_counts[fs_flag] == 0:
+                    print(f"  Warning: 0 events pass baseline cuts for '{fs_flag}' in {file_path} "
+                          f"({flag_counts[fs_flag]} passed the flag(s) before baseline cuts)")
+                    continue
+                if not event_chunks[fs_flag]:
+                    continue
+                file_data = self._process_extracted_data(_merge_chunks(event_chunks[fs_flag]))
+                if file_data:
+                    event_result[fs_flag] = file_data
+                else:
+                    print(f"  Warning: Events passed '{fs_flag}' and baseline cuts but failed "
+                          f"mode validation in {file_path}")
+
+            for i in range(len(custom_cuts)):
+                region = f"CustomRegion{i+1}"
+                if not custom_chunks[region]:
+                    continue
+                file_data = self._process_extracted_data(_merge_chunks(custom_chunks[region]))
+                if file_data:
+                    custom_result[region] = file_data
 
         except Exception as e:
             print(f"  Error loading {file_path}: {e}")
+        finally:
+            if self._close_files_after_load:
+                self._close_file(file_path)
 
         return file_path, event_result, custom_result
 
     def _extract_values(self, data, mask, is_data=False):
         """Helper method to extract values for both event flags and custom cuts."""
-        # Initialize storage for all variables
-        extracted_data = {}
+        idx = np.flatnonzero(mask)
 
-        indices = np.where(mask)[0]
-        for idx in indices:
-            # Mode-specific validation
-            passes_validation = False
-
-            if self.analysis_mode == AnalysisMode.UNCOMPRESSED:
-                # Uncompressed mode: require rjr_Ms, rjr_Rs, and rjrPTS < 150
-                if ('rjr_Ms' in data and 'rjr_Rs' in data and 'rjrPTS' in data and
-                    len(data['rjr_Ms'][idx]) > 0 and
-                    len(data['rjr_Rs'][idx]) > 0 and
-                    len(data['rjrPTS'][idx]) > 0 and
-                    data['rjrPTS'][idx][0] < AnalysisConfig.RJR_PTS_CUT):
-                    passes_validation = True
+        # Mode-specific validation, evaluated for all masked events at once
+        if self.analysis_mode == AnalysisMode.UNCOMPRESSED:
+            # Uncompressed mode: require rjr_Ms, rjr_Rs, and rjrPTS < 150
+            if 'rjr_Ms' in data and 'rjr_Rs' in data and 'rjrPTS' in data:
+                pts_counts = _jagged_counts(data['rjrPTS'][idx])
+                valid = ((_jagged_counts(data['rjr_Ms'][idx]) > 0) &
+                         (_jagged_counts(data['rjr_Rs'][idx]) > 0) &
+                         (pts_counts > 0))
+                # NaN (no element) compares False
+                valid &= _jagged_first(data['rjrPTS'][idx], pts_counts) < AnalysisConfig.RJR_PTS_CUT
             else:
-                # Compressed mode: require rjrIsr_PtIsr, rjrIsr_nSVisObjects > 0, and ISR pT cut
-                if 'rjrIsr_PtIsr' in data and 'rjrIsr_nSVisObjects' in data:
-                    passes_pt = (self.isr_pt_cut is None or
-                                 data['rjrIsr_PtIsr'][idx] >= self.isr_pt_cut)
-                    passes_nsv = data['rjrIsr_nSVisObjects'][idx] > 0
-                    passes_validation = passes_pt and passes_nsv
-
-            if not passes_validation:
+                valid = np.zeros(len(idx), dtype=bool)
+        else:
+            # Compressed mode: require rjrIsr_PtIsr, rjrIsr_nSVisObjects > 0, and ISR pT cut
+            if 'rjrIsr_PtIsr' in data and 'rjrIsr_nSVisObjects' in data:
+                valid = data['rjrIsr_nSVisObjects'][idx] > 0
+                if self.isr_pt_cut is not None:
+                    valid &= data['rjrIsr_PtIsr'][idx] >= self.isr_pt_cut
+            else:
+                valid = np.zeros(len(idx), dtype=bool)
+
+        sel = idx[valid]
+        if len(sel) == 0:
+            return {}
+
+        # Base event weight per selected event
+        if is_data:
+            base_weights = np.ones(len(sel))
+        else:
+            base_weights = data['evtFillWgt'][sel].astype(np.float64) * self.luminosity
+
+        extracted_data = {}
+        # Every branch of a collection (HadronicSV, LeptonicSV, baseLinePhoton,
+        # selPho) has the same per-event multiplicity: count and repeat the
+        # weights once per collection rather than once per variable
+        collection_counts = {}
+        collection_weights = {}
+
+        def _counts(collection, arrays):
+            if collection not in collection_counts:
+                collection_counts[collection] = _jagged_counts(arrays)
+            return collection_counts[collection]
+
+        def _repeated_weights(collection, counts):
+            if collection not in collection_weights:
+                collection_weights[collection] = np.repeat(base_weights, counts)
+            return collection_weights[collection]
+
+        # Extract all configured variables
+        for var_key, weights_key, kind, collection, scale, mc_only, cross_cut in _VARIABLE_PLAN:
+            if var_key not in data:
                 continue
 
-            # Get base event weight
-            base_weight = 1.0 if is_data else data['evtFillWgt'][idx] * self.luminosity
+            # Skip MC-only variables when processing data
+            if mc_only and is_data:
+                continue
 
-            # Extract all configured variables
-            for var_key, var_config in AnalysisConfig.VARIABLES.items():
-                if var_key not in data:
-                    continue
+            values = np.array([], dtype=VALUE_DTYPE)
+            weights = np.array([])
+
+            if kind == 'rjr':
+                # Special case: rjr variables take element [0]
+                counts = _jagged_counts(data[var_key][sel])
+                keep = counts > 0
+
+                # Apply cross-cut on the paired RJR variable if defined; events
+                # without a paired value are not cut
+                if cross_cut:
+                    other_branch, op, threshold, other_scale = cross_cut
+                    if other_branch in data:
+                        other_counts = _jagged_counts(data[other_branch][sel])
+                        other_val = _jagged_first(data[other_branch][sel], other_counts) * other_scale
+                        passes = other_val > threshold if op == '>' else other_val < threshold
+                        keep &= (other_counts == 0) | passes
+
+                values = np.multiply(_jagged_first(data[var_key][sel], counts)[keep], scale,
+                                     dtype=VALUE_DTYPE)
+                weights = base_weights[keep]
+
+            elif kind == 'sv':
+                sv_arrays = data[var_key][sel]
+                counts = _counts(collection, sv_arrays)
+                if self.analysis_mode == AnalysisMode.COMPRESSED:
+                    # Extract only the leading SV to avoid per-event array flattening
+                    # on large data files; consistent with custom-cut evaluation.
+                    keep = counts > 0
+                    values = np.multiply(_jagged_first(sv_arrays, counts)[keep], scale,
+                                         dtype=VALUE_DTYPE)
+                    weights = base_weights[keep]
+                else:
+                    values = _jagged_scaled(sv_arrays, counts, scale)
+                    weights = _repeated_weights(collection, counts)
 
-                # Skip MC-only variables when processing data
-                if var_config.get('mc_only', False) and is_data:
-                    continue
+            elif kind == 'photon':
+                if self.analysis_mode != AnalysisMode.COMPRESSED:
+                    photon_arrays = data[var_key][sel]
+                    counts = _counts(collection, photon_arrays)
+                    values = _jagged_scaled(photon_arrays, counts, scale)
+                    weights = _repeated_weights(collection, counts)
 
-                if var_key not in extracted_data:
-                    extracted_data[var_key] = []
-                    if var_key != 'weights':  # Don't create weights array for weights key
-                        extracted_data[f'{var_key}_weights'] = []
-
-                if var_key in ['rjr_Ms', 'rjr_Rs']:
-                    # Special case: rjr variables take element [0]
-                    if len(data[var_key][idx]) > 0:
-                        raw_val = data[var_key][idx][0]
-                        scaled_val = raw_val * var_config['scale']
-
-                        # Apply cross-cut on the paired RJR variable if defined
-                        cross_cut = var_config.get('cross_cut')
-                        if cross_cut:
-                            other_branch, op, threshold = cross_cut
-                            other_scale = AnalysisConfig.VARIABLES[other_branch]['scale']
-                            if (other_branch in data and len(data[other_branch][idx]) > 0):
-                                other_val = data[other_branch][idx][0] * other_scale
-                                if not (other_val > threshold if op == '>' else other_val < threshold):
-                                    continue
-
-                        extracted_data[var_key].append(scaled_val)
-                        extracted_data[f'{var_key}_weights'].append(base_weight)
-
-                elif var_key.startswith('HadronicSV_') or var_key.startswith('LeptonicSV_'):
-                    sv_array = data[var_key][idx]
-                    if self.analysis_mode == AnalysisMode.COMPRESSED:
-                        # Extract only the leading SV to avoid per-event array flattening
-                        # on large data files; consistent with custom-cut evaluation.
-                        if len(sv_array) > 0:
-                            scaled_val = float(sv_array[0]) * var_config['scale']
-                            extracted_data[var_key].append(scaled_val)
-                            extracted_data[f'{var_key}_weights'].append(base_weight)
-                    else:
-                        for sv_val in sv_array:
-                            scaled_val = sv_val * var_config['scale']
-                            extracted_data[var_key].append(scaled_val)
-                            extracted_data[f'{var_key}_weights'].append(base_weight)
-
-                elif var_key.startswith('baseLinePhoton_'):
-                    if self.analysis_mode == AnalysisMode.COMPRESSED:
-                        continue
-                    photon_array = data[var_key][idx]
-                    for ph_val in photon_array:
-                        scaled_val = ph_val * var_config['scale']
-                        extracted_data[var_key].append(scaled_val)
-                        extracted_data[f'{var_key}_weights'].append(base_weight)
-
-                elif not var_config['is_vector']:
-                    # Scalar event-level variables (like selCMet, ISR variables)
-                    raw_val = data[var_key][idx]
-                    scaled_val = raw_val * var_config['scale']
-                    extracted_data[var_key].append(scaled_val)
-                    extracted_data[f'{var_key}_weights'].append(base_weight)
-
-        # Convert all lists to numpy arrays
-        for var_key in extracted_data:
-            extracted_data[var_key] = np.array(extracted_data[var_key])
+            elif kind == 'scalar':
+                # Scalar event-level variables (like selCMet, ISR variables)
+                values = np.multiply(data[var_key][sel], scale, dtype=VALUE_DTYPE)
+                weights = base_weights
+
+            extracted_data[var_key] = values
+            extracted_data[weights_key] = weights
 
         return extracted_data
 
@@ -702,116 +1207,10 @@ class DataLoader:
         Parse simple cut expressions without eval().
         Supports patterns like: 'var==value', 'var1==val1 && var2==val2'
         Handles &&, &, and || as logical operators.
+        The parsed cut is cached (see _compile_cut), so only the first call per
+        cut string pays for parsing.
         """
-        import re
-
-        cut_string = cut_string.strip()
-
-        # Strip matching outer parentheses and recurse
-        if cut_string.startswith('(') and cut_string.endswith(')'):
-            # Verify they actually match (not e.g. "(a>1) | (b>1)")
-            depth = 0
-            matched = True
-            for i, ch in enumerate(cut_string):
-                if ch == '(':
-                    depth += 1
-                elif ch == ')':
-                    depth -= 1
-                if depth == 0 and i < len(cut_string) - 1:
-                    matched = False
-                    break
-            if matched:
-                return self._parse_simple_cut(cut_string[1:-1], variables)
-
-        # Normalize logical operators: replace '&&' with ' & ' and '||' with ' | '
-        normalized = cut_string.replace('&&', ' & ').replace('||', ' | ')
-
-        # Split on OR first (lower precedence), respecting parentheses
-        or_parts = self._split_respecting_parens(normalized, ' | ')
-        if len(or_parts) > 1:
-            result_mask = None
-            for part in or_parts:
-                part_mask = self._parse_simple_cut(part, variables)
-                if result_mask is None:
-                    result_mask = part_mask
-                else:
-                    result_mask = result_mask | part_mask
-            return result_mask
-
-        # Then split on AND, respecting parentheses
-        and_parts = self._split_respecting_parens(normalized, ' & ')
-        if len(and_parts) > 1:
-            result_mask = None
-            for part in and_parts:
-                part_mask = self._parse_simple_cut(part, variables)
-                if result_mask is None:
-                    result_mask = part_mask
-                else:
-                    result_mask = result_mask & part_mask
-            return result_mask
-
-        # Single condition
-        return self._evaluate_single_condition(cut_string.strip(), variables)
-
-    def _split_respecting_parens(self, text, delimiter):
-        """Split text on delimiter only when not inside parentheses."""
-        parts = []
-        depth = 0
-        current = []
-        i = 0
-        while i < len(text):
-            if text[i] == '(':
-                depth += 1
-                current.append(text[i])
-                i += 1
-            elif text[i] == ')':
-                depth -= 1
-                current.append(text[i])
-                i += 1
-            elif depth == 0 and text[i:i+len(delimiter)] == delimiter:
-                parts.append(''.join(current).strip())
-                current = []
-                i += len(delimiter)
-            else:
-                current.append(text[i])
-                i += 1
-        parts.append(''.join(current).strip())
-        return parts
-
-    def _evaluate_single_condition(self, condition, variables):
-        """
-        Evaluate a single condition like 'nSelPhotons==1'
-        """
-        import re
-        
-        # Parse condition with regex ($ anchor ensures full match, no trailing text ignored)
-        match = re.match(r'(\w+)\s*(==|!=|<=|>=|<|>)\s*(\d+(?:\.\d+)?)\s*$', condition)
-        if not match:
-            raise ValueError(f"Cannot parse condition: {condition}")
-            
-        var_name, operator, value_str = match.groups()
-        
-        if var_name not in variables:
-            raise ValueError(f"Unknown variable: {var_name}")
-            
-        array = variables[var_name]
-        value = float(value_str) if '.' in value_str else int(value_str)
-        
-        # Apply the operation
-        if operator == '==':
-            return array == value
-        elif operator == '!=':
-            return array != value
-        elif operator == '<':
-            return array < value
-        elif operator == '>':
-            return array > value
-        elif operator == '<=':
-            return array <= value
-        elif operator == '>=':
-            return array >= value
-        else:
-            raise ValueError(f"Unknown operator: {operator}")
+        return _compile_cut(cut_string)(variables)
 
     def combine_data(self, data_dict):
         """Combines data from multiple files (e.g. for total background)."""
@@ -822,6 +1221,10 @@ class DataLoader:
         first_data = next(iter(data_dict.values()))
         all_keys = list(first_data.keys())
 
+        if len(data_dict) == 1:
+            # Nothing to merge: hand the arrays through instead of copying them
+            return dict(first_data) if first_data else None
+
         # Combine all variables that exist across all files
         combined = {}
         for key in all_keys:
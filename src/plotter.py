@@ -1,3 +1,7 @@
+import functools
+import itertools
+import re
+
 import ROOT
 import numpy as np
 try:
@@ -59,10 +63,180 @@ from src.style import StyleManager
 from src.utils import parse_signal_name, parse_background_name
 from src.config import AnalysisConfig
 from src.unrolled import UnrolledBinning
+from src import _hist_kernels
 
 ROOT.gROOT.ForceStyle(False)
 
+# Units suffix of an axis label, e.g. ' [TeV]'
+_UNITS_RE = re.compile(r'\s*\[.*?\]')
+
+@functools.lru_cache(maxsize=None)
+def _clean_var_label(label):
+    """Axis label with its units removed, e.g. 'M_{S} [TeV]' -> 'M_{S}'."""
+    return _UNITS_RE.sub('', label).strip()
+
+# Background to color mapping (using original hex color indices, see
+# PlotterDataMC._ensure_mc_colors)
+# QCD=purple, WJets=teal, ZJets=yellow/gold, TTX=red/orange, GJets=pink/rose
+_BG_COLOR_MAP = {
+    'QCD multijets': 1179,        # #5A4484 - Purple
+    'W + jets': 1180,             # #347889 - Teal/Blue-green
+    'Z + jets': 1181,             # #F4B240 - Yellow/Gold
+    't#bar{t} + X': 1182,         # #E54B26 - Red/Orange
+    't#bar{t} + jets': 1182,      # #E54B26 - Red/Orange (same as TTX)
+    '#gamma + jets': 1183,        # #C05780 - Pink/Rose
+    # Assign remaining backgrounds to remaining colors
+    'Drell-Yan': 1184,            # #7A68A6 - Light purple
+    'Diboson': 1185,              # #2E8B57 - Sea green
+    'Single top': 1186,           # #8B4513 - Saddle brown
+}
+_PLUS_RE = re.compile(r'\s*\+\s*')
+_SPACE_RE = re.compile(r'\s+')
+
+@functools.lru_cache(maxsize=None)
+def _bg_color(filename):
+    """MC color index for a background file or group name."""
+    # Try parsed name first, then raw filename (handles YAML group names like "W+jets")
+    for candidate in (parse_background_name(filename), filename):
+        # Pad + with spaces and collapse whitespace so "W+jets" == "W + jets"
+        normalized = _SPACE_RE.sub(' ', _PLUS_RE.sub(' + ', candidate)).strip()
+        color = _BG_COLOR_MAP.get(normalized)
+        if color is not None:
+            return color
+
+    return 1179  # Default to purple if not found
+
+# Shared read-only fallback for samples with no weights at all
+_EMPTY = np.empty(0, dtype=np.float64)
+_EMPTY.flags.writeable = False
+
+def _var_weights(data, weights_key):
+    """Per-variable weights if the sample has them, else its event weights."""
+    weights = data.get(weights_key)
+    return weights if weights is not None else data.get('weights', _EMPTY)
+
+def _bin_view(arr, n, dtype=np.float64):
+    """Zero-copy numpy view of a ROOT histogram's flat bin (or sumw2) array of length n."""
+    arr.reshape((n,))
+    return np.frombuffer(arr, dtype=dtype, count=n)
+
+def normalize_hist(hist):
+    """
+    Scale a 1D or 2D histogram to unit area, equivalent to Scale(1/Integral()),
+    in a single in-place pass over its bin array. Returns the original integral.
+    """
+    n = hist.GetSize()
+    dtype = np.float32 if isinstance(hist, ROOT.TArrayF) else np.float64
+    contents = _bin_view(hist.GetArray(), n, dtype)
+    # Integral() only sums in-range bins (no under/overflow)
+    if hist.GetDimension() == 1:
+        in_range = contents[1:-1]
+    elif hist.GetDimension() == 2:
+        in_range = contents.reshape(hist.GetNbinsY() + 2, hist.GetNbinsX() + 2)[1:-1, 1:-1]
+    else:
+        integral = hist.Integral()
+        if integral > 0:
+            hist.Scale(1.0 / integral)
+        return integral
+    integral = float(in_range.sum(dtype=np.float64))
+    if integral <= 0:
+        return integral
+    scale = 1.0 / integral
+    # Like TH1::Scale, switch on sumw2 first so the errors follow the contents
+    if hist.GetSumw2N() == 0:
+        hist.Sumw2()
+    np.multiply(contents, scale, out=contents, casting='unsafe')
+    sumw2 = _bin_view(hist.GetSumw2().GetArray(), n)
+    np.multiply(sumw2, scale * scale, out=sumw2)
+    return integral
+
+def _axis_bins(values, nbins, lo, hi):
+    """
+    Fixed-width bin index of each value as TAxis::FindBin computes it:
+    0 for underflow, nbins+1 for overflow (and NaN), 1..nbins in range.
+    Values are compared and binned in double precision, as Fill does; numpy 1.x
+    would otherwise compare float32 input against float32-rounded edges.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    lo, hi = float(lo), float(hi)
+    idx = np.full(values.size, nbins + 1, dtype=np.intp)
+    idx[values < lo] = 0
+    in_range = (values >= lo) & (values < hi)
+    # nbins*(x-lo)/(hi-lo), in TAxis::FindFixBin's operation order so values on
+    # a bin edge land in the same bin as with Fill
+    local = nbins * (values[in_range] - lo) / (hi - lo)
+    idx[in_range] = np.minimum(local.astype(np.intp), nbins - 1) + 1
+    return idx
+
+def _fill_array(values):
+    """
+    Contiguous floating-point array for filling; float32 loader output is
+    passed through as-is (the numba kernels bin it in double precision, only
+    the numpy fallback widens it).
+    """
+    arr = np.asarray(values)
+    if arr.dtype.kind != 'f':
+        arr = arr.astype(np.float64)
+    return np.ascontiguousarray(arr)
+
+def _bin_sums(idx, weights, n):
+    """Per-bin sum of weights and of squared weights at global bin indices idx."""
+    return (np.bincount(idx, weights=weights, minlength=n),
+            np.bincount(idx, weights=weights * weights, minlength=n))
+
+def _add_bin_sums(hist, sumw, sumw2, n_entries):
+    """
+    Add per-bin weight sums into the histogram's bin and sumw2 arrays in place,
+    instead of one Fill per entry.
+    """
+    n = hist.GetSize()
+    if hist.GetSumw2N() == 0:
+        hist.Sumw2()
+    entries = hist.GetEntries() + n_entries
+    dtype = np.float32 if isinstance(hist, ROOT.TArrayF) else np.float64
+    contents = _bin_view(hist.GetArray(), n, dtype)
+    np.add(contents, sumw, out=contents, casting='unsafe')
+    hist_sumw2 = _bin_view(hist.GetSumw2().GetArray(), n)
+    hist_sumw2 += sumw2
+    # Recompute the moments from the new contents, keeping the raw entry count FillN would give
+    hist.ResetStats()
+    hist.SetEntries(entries)
+
+def _fill_hist_1d(hist, data, weights, n):
+    """Weighted fill of the first n entries of a fixed-binning TH1."""
+    x_axis = hist.GetXaxis()
+    nbins, lo, hi = hist.GetNbinsX(), x_axis.GetXmin(), x_axis.GetXmax()
+    size = hist.GetSize()
+    if _hist_kernels.HAVE_NUMBA:
+        # One compiled pass computes both sums
+        sumw, sumw2 = np.zeros(size), np.zeros(size)
+        _hist_kernels.fill1d(data[:n], weights[:n], nbins, lo, hi, sumw, sumw2)
+    else:
+        sumw, sumw2 = _bin_sums(_axis_bins(data[:n], nbins, lo, hi), weights[:n], size)
+    _add_bin_sums(hist, sumw, sumw2, n)
+
+def _fill_hist_2d(hist, x, y, weights, n):
+    """Weighted fill of the first n (x, y) pairs of a fixed-binning TH2."""
+    x_axis = hist.GetXaxis()
+    y_axis = hist.GetYaxis()
+    nbins_x, x_lo, x_hi = hist.GetNbinsX(), x_axis.GetXmin(), x_axis.GetXmax()
+    nbins_y, y_lo, y_hi = hist.GetNbinsY(), y_axis.GetXmin(), y_axis.GetXmax()
+    size = hist.GetSize()
+    if _hist_kernels.HAVE_NUMBA:
+        sumw, sumw2 = np.zeros(size), np.zeros(size)
+        _hist_kernels.fill2d(x[:n], y[:n], weights[:n], nbins_x, x_lo, x_hi,
+                             nbins_y, y_lo, y_hi, sumw, sumw2)
+    else:
+        ix = _axis_bins(x[:n], nbins_x, x_lo, x_hi)
+        iy = _axis_bins(y[:n], nbins_y, y_lo, y_hi)
+        # Global bin = binx + (nbinsx+2)*biny, as in TH1::GetBin
+        sumw, sumw2 = _bin_sums(ix + (nbins_x + 2) * iy, weights[:n], size)
+    _add_bin_sums(hist, sumw, sumw2, n)
+
 class PlotterBase:
+    # Suffix for unique ROOT object names, shared by all plotters
+    _name_counter = itertools.count()
+
     def __init__(self, style_manager):
         self.style = style_manager
 
@@ -87,23 +261,21 @@ class PlotterBase:
         """Map a short variable name (e.g. 'ms') to its full branch key (e.g. 'rjr_Ms').
         Derived dynamically from AnalysisConfig.VARIABLES so new variables work automatically.
         Falls back to var_name itself if no match is found."""
-        for branch, conf in AnalysisConfig.VARIABLES.items():
-            if conf['name'] == var_name:
-                return branch
-        return var_name
+        return AnalysisConfig.get_var_branch(var_name) or var_name
 
 class Plotter1D(PlotterBase):
     def __init__(self, style_manager):
         super().__init__(style_manager)
 
     def create_histogram(self, data, weights, bins, x_min, x_max, title, color=ROOT.kBlack, style=1):
-        hist = ROOT.TH1F(f"h_{title}_{np.random.randint(0, 10000)}", title, bins, x_min, x_max)
-        hist.SetDirectory(0)
-        hist.Sumw2()
-        
-        # Efficient filling
-        for val, w in zip(data, weights):
-            hist.Fill(val, w)
+        hist = ROOT.TH1F(f"h_{title}_{next(PlotterBase._name_counter)}", title, bins, x_min, x_max)
+        
+        # Bin in numpy and write the bin arrays directly instead of FillN
+        data_array = _fill_array(data)
+        weights_array = np.ascontiguousarray(weights, dtype=np.float64)
+        n = min(data_array.size, weights_array.size)
+        if n > 0:
+            _fill_hist_1d(hist, data_array, weights_array, n)
             
         hist.SetLineColor(color)
         hist.SetLineStyle(style)
@@ -115,30 +287,34 @@ class Plotter1D(PlotterBase):
 
     def setup_axes(self, hist, x_label, y_label="Events", normalized=False):
         """Configures axis properties for visibility and consistent styling."""
+        style = self.style
+        title_size = style.axis_title_size
+        label_size = style.axis_label_size
         hist.SetStats(0)
         hist.SetTitle("")
-        hist.GetXaxis().SetTitle(x_label)
-        hist.GetXaxis().SetTitleOffset(self.style.axis_title_offset)
-        hist.GetXaxis().SetTitleSize(self.style.axis_title_size)
-        hist.GetXaxis().SetLabelSize(self.style.axis_label_size)
-        hist.GetXaxis().CenterTitle(True)
+        x_axis = hist.GetXaxis()
+        x_axis.SetTitle(x_label)
+        x_axis.SetTitleOffset(style.axis_title_offset)
+        x_axis.SetTitleSize(title_size)
+        x_axis.SetLabelSize(label_size)
+        x_axis.CenterTitle(True)
         
         # Set y-axis title based on normalization
         if normalized:
             # Extract just the variable name without units for the normalized y-axis title
             # Remove units in brackets like [TeV] and clean up the variable name
-            import re
-            clean_var = re.sub(r'\s*\[.*?\]', '', x_label).strip()
+            clean_var = _clean_var_label(x_label)
             #y_axis_title = f"#frac{{1}}{{N}}  #frac{{dN}}{{d({clean_var})}}"
             y_axis_title = "normalized events"
         else:
             y_axis_title = y_label
             
-        hist.GetYaxis().SetTitle(y_axis_title)
-        hist.GetYaxis().SetTitleOffset(1.5 if normalized else self.style.axis_title_offset)
-        hist.GetYaxis().SetTitleSize(self.style.axis_title_size)
-        hist.GetYaxis().SetLabelSize(self.style.axis_label_size)
-        hist.GetYaxis().CenterTitle(True)
+        y_axis = hist.GetYaxis()
+        y_axis.SetTitle(y_axis_title)
+        y_axis.SetTitleOffset(1.5 if normalized else style.axis_title_offset)
+        y_axis.SetTitleSize(title_size)
+        y_axis.SetLabelSize(label_size)
+        y_axis.CenterTitle(True)
 
     def _initialize_canvas(self, name, x_min, x_max, var_label, y_label="Events"):
         """Helper to initialize a consistent CMS canvas."""
@@ -156,38 +332,35 @@ class Plotter1D(PlotterBase):
         canvas_name = f"{collection_type.lower()}s_{var_name}_{suffix}"
         canvas = self._initialize_canvas(canvas_name, x_min, x_max, var_label)
         
-        # Use different legend position for background plots
+        # Use different legend position and label parser for background plots
         if collection_type.lower() == "background":
             legend = CMS.cmsLeg(0.63, 0.63, 0.94, 0.88, textSize=0.035)
+            parse_label = parse_background_name
         else:
             legend = CMS.cmsLeg(0.35, 0.675, 0.65, 0.874, textSize=0.035)
+            parse_label = parse_signal_name
         
         mapped_key = self._map_var_name(var_name)
         var_weights_key = f'{mapped_key}_weights'
         hists = []
         max_y = 0
+        get_color = self.style.get_color
+        create = self.create_histogram
 
         for i, (filename, data) in enumerate(data_collection.items()):
             if mapped_key not in data:
                 continue
-            color = self.style.get_color(i)
-            weights = data.get(var_weights_key, data.get('weights', []))
-            h = self.create_histogram(data[mapped_key], weights, bins, x_min, x_max, filename, color=color)
-            if normalized and h.Integral() > 0:
-                h.Scale(1.0 / h.Integral())
+            weights = _var_weights(data, var_weights_key)
+            h = create(data[mapped_key], weights, bins, x_min, x_max, filename, color=get_color(i))
+            if normalized:
+                normalize_hist(h)
             
-            if h.GetMaximum() > max_y:
-                max_y = h.GetMaximum()
+            h_max = h.GetMaximum()
+            if h_max > max_y:
+                max_y = h_max
                 
             hists.append(h)
-            
-            # Determine label based on collection type
-            if collection_type.lower() == "background":
-                label = parse_background_name(filename)
-            else:
-                label = parse_signal_name(filename)
-                
-            legend.AddEntry(h, label, "fl")
+            legend.AddEntry(h, parse_label(filename), "fl")
 
         if not hists:
             return None
@@ -223,29 +396,32 @@ class Plotter1D(PlotterBase):
         
         legend = CMS.cmsLeg(0.35, 0.675, 0.65, 0.874, textSize=0.035)
         
+        mapped_var = self._map_var_name(var_name)
+        
         # Background
-        bg_hist = self.create_histogram(background_combined[self._map_var_name(var_name)], background_combined['weights'], bins, x_min, x_max, "Total Background")
+        bg_hist = self.create_histogram(background_combined[mapped_var], background_combined['weights'], bins, x_min, x_max, "Total Background")
         bg_hist.SetFillColor(ROOT.kGray+1)
         bg_hist.SetLineColor(ROOT.kGray+2)
         bg_hist.SetFillStyle(3004)
         
-        if normalized and bg_hist.Integral() > 0:
-            bg_hist.Scale(1.0 / bg_hist.Integral())
+        if normalized:
+            normalize_hist(bg_hist)
             
         max_y = bg_hist.GetMaximum()
         
         # Signals
         sig_hists = []
+        get_color = self.style.get_color
+        create = self.create_histogram
         for i, (filename, data) in enumerate(signals_data.items()):
             # Use distinct colors for signals
-            color = self.style.get_color(i)
-            
-            h = self.create_histogram(data[self._map_var_name(var_name)], data['weights'], bins, x_min, x_max, filename, color=color)
-            if normalized and h.Integral() > 0:
-                h.Scale(1.0 / h.Integral())
+            h = create(data[mapped_var], data['weights'], bins, x_min, x_max, filename, color=get_color(i))
+            if normalized:
+                normalize_hist(h)
             
-            if h.GetMaximum() > max_y:
-                max_y = h.GetMaximum()
+            h_max = h.GetMaximum()
+            if h_max > max_y:
+                max_y = h_max
             
             sig_hists.append(h)
             label = parse_signal_name(filename)
@@ -300,11 +476,10 @@ class Plotter1D(PlotterBase):
         for i, (file_path, data) in enumerate(signal_sr_collection.items()):
             if mapped_var not in data:
                 continue
-            weights = data.get(var_weights_key, data.get('weights', []))
+            weights = _var_weights(data, var_weights_key)
             h = self.create_histogram(data[mapped_var], weights, bins, x_min, x_max,
                                       file_path, color=self.style.get_color(i))
-            if h.Integral() > 0:
-                h.Scale(1.0 / h.Integral())
+            normalize_hist(h)
             max_y = max(max_y, h.GetMaximum())
             sig_hists.append(h)
             legend.AddEntry(h, parse_signal_name(file_path), "fl")
@@ -314,14 +489,13 @@ class Plotter1D(PlotterBase):
         for data in data_cr_collection.values():
             if mapped_var in data:
                 all_cr_vals.extend(data[mapped_var])
-                all_cr_weights.extend(data.get(var_weights_key, data.get('weights', [])))
+                all_cr_weights.extend(_var_weights(data, var_weights_key))
 
         h_cr = None
         if all_cr_vals:
             h_cr = self.create_histogram(np.array(all_cr_vals), np.array(all_cr_weights),
                                          bins, x_min, x_max, "data_cr", color=ROOT.kBlack)
-            if h_cr.Integral() > 0:
-                h_cr.Scale(1.0 / h_cr.Integral())
+            normalize_hist(h_cr)
             h_cr.SetLineWidth(3)
             max_y = max(max_y, h_cr.GetMaximum())
             legend.AddEntry(h_cr, cr_label, "l")
@@ -354,12 +528,16 @@ class Plotter2D(PlotterBase):
         super().__init__(style_manager)
         
     def create_2d_histogram(self, ms, rs, weights, nbins_x, x_min, x_max, nbins_y, y_min, y_max, title):
-        hist = ROOT.TH2F(f"h2d_{title}_{np.random.randint(0,10000)}", title, nbins_x, x_min, x_max, nbins_y, y_min, y_max)
-        hist.SetDirectory(0)
-        
-        for m, r, w in zip(ms, rs, weights):
-            hist.Fill(m, r, w)
-            
+        hist = ROOT.TH2F(f"h2d_{title}_{next(PlotterBase._name_counter)}", title, nbins_x, x_min, x_max, nbins_y, y_min, y_max)
+
+        # Bin in numpy and write the bin arrays directly instead of TH2::FillN
+        x = _fill_array(ms)
+        y = _fill_array(rs)
+        w = np.ascontiguousarray(weights, dtype=np.float64)
+        n = min(x.size, y.size, w.size)
+        if n > 0:
+            _fill_hist_2d(hist, x, y, w, n)
+
         return hist
 
     def plot_2d_baseFormat(self, hist, x_var, y_var, canvas, axis_labels, sample_label, final_state_label, sample_label_x_pos=0.65, prelim_str = "Preliminary",normalize=False):
@@ -446,28 +624,42 @@ class Plotter2D(PlotterBase):
 
 
 
-    def plot_2d(self, data, name, sample_label, final_state_label, sample_label_x_pos=0.65):
-        """Creates a CMS styled 2D plot."""
+    def plot_2d(self, data, name, sample_label, final_state_label, sample_label_x_pos=0.65, x_var='rjr_Ms', y_var='rjr_Rs', is_data=False):
+        """Creates a CMS styled 2D plot of y_var vs x_var."""
+        return next(self.plot_many([(data, name, sample_label, final_state_label, sample_label_x_pos)],
+                                   x_var=x_var, y_var=y_var, is_data=is_data))
+
+    def plot_many(self, inputs, x_var='rjr_Ms', y_var='rjr_Rs', is_data=False):
+        """
+        Creates CMS styled 2D plots of y_var vs x_var for a batch of samples.
+        inputs: iterable of (data, name, sample_label, final_state_label, sample_label_x_pos)
+        Yields (canvas, hist) per input, so each canvas can be saved and closed
+        before the next one is built. Variable config and axis labels are
+        resolved once for the whole batch.
+        """
         # Load ranges from config
-        ms_conf = AnalysisConfig.VARIABLES['rjr_Ms']
-        rs_conf = AnalysisConfig.VARIABLES['rjr_Rs']
-        
-        ms_min, ms_max = ms_conf['range']
-        rs_min, rs_max = rs_conf['range']
-        ms_label = ms_conf['label']
-        rs_label = rs_conf['label']
-        
-        hist = self.create_2d_histogram(data['rjr_Ms'], data['rjr_Rs'], data['weights'], 
-                                      ms_conf['bins'], ms_min, ms_max, 
-                                      rs_conf['bins'], rs_min, rs_max, name)
+        x_conf = AnalysisConfig.VARIABLES[x_var]
+        y_conf = AnalysisConfig.VARIABLES[y_var]
         
-        canvas = CMS.cmsCanvas(name, ms_min, ms_max, rs_min, rs_max, ms_label, rs_label, 
-                              square=False, extraSpace=0.01, iPos=0, with_z_axis=True)
-        axis_labels = {}
-        axis_labels['x'] = ms_label
-        axis_labels['y'] = rs_label
-        self.plot_2d_baseFormat(hist, canvas, axis_labels, sample_label, final_state_label, sample_label_x_pos=sample_label_x_pos)
-        return canvas, hist
+        x_min, x_max = x_conf['range']
+        y_min, y_max = y_conf['range']
+        x_label = x_conf['label']
+        y_label = y_conf['label']
+        axis_labels = {'x': x_label, 'y': y_label}
+        prelim_str = "Preliminary" if is_data else "Preliminary Simulation"
+        
+        for data, name, sample_label, final_state_label, sample_label_x_pos in inputs:
+            # Per-object variables (SV, photon) carry their own repeated weights
+            hist = self.create_2d_histogram(data[x_var], data[y_var],
+                                          _var_weights(data, f'{x_var}_weights'),
+                                          x_conf['bins'], x_min, x_max, 
+                                          y_conf['bins'], y_min, y_max, name)
+            
+            canvas = CMS.cmsCanvas(name, x_min, x_max, y_min, y_max, x_label, y_label, 
+                                  square=False, extraSpace=0.01, iPos=0, with_z_axis=True)
+            self.plot_2d_baseFormat(hist, x_var, y_var, canvas, axis_labels, sample_label, final_state_label,
+                                    sample_label_x_pos=sample_label_x_pos, prelim_str=prelim_str)
+            yield canvas, hist
 
 class Plotter2D_v2(Plotter2D):
     def __init__(self, style_manager):
@@ -500,6 +692,9 @@ class PlotterDataMC(PlotterBase):
         # Define MC colors - indices for colors created by _ensure_mc_colors()
         self.mc_colors = [1179, 1180, 1181, 1182, 1183, 1184, 1185, 1186]
         self.data_color = ROOT.kBlack
+        # (data_collection, combined) for the last collection merged; holding the
+        # collection itself keeps its id from being reused while cached
+        self._combined_cache = (None, None)
     
     def _setup_comparison_canvas(self, canvas_name, x_min, x_max, x_label="", canvas_width=1100, canvas_height=800):
         """Shared canvas setup for data/MC comparison plots."""
@@ -533,18 +728,28 @@ class PlotterDataMC(PlotterBase):
         pad1.SetRightMargin(self.style.margin_right_ratio)
     
     
-    def _create_mc_uncertainty_band(self, mc_histograms):
-        """Create MC uncertainty band with existing data/MC styling."""
-        if not mc_histograms:
-            return None
-        
-        # Get the sum of all MC histograms for uncertainty band (like original code)
+    def _sum_mc_histograms(self, mc_histograms, name="total_mc"):
+        """Sum of all MC histograms, or None if there are none."""
         total_mc = None
         for mc_hist, _ in mc_histograms:
             if total_mc is None:
-                total_mc = mc_hist.Clone("total_mc_for_uncertainty")
+                total_mc = mc_hist.Clone(name)
+                total_mc.SetDirectory(0)
             else:
                 total_mc.Add(mc_hist)
+        return total_mc
+
+    def _create_mc_uncertainty_band(self, mc_histograms, total_mc=None):
+        """
+        Create MC uncertainty band with existing data/MC styling.
+        total_mc: the already summed MC histogram, if the caller has it.
+        """
+        if not mc_histograms:
+            return None
+        
+        # Get the sum of all MC histograms for uncertainty band (like original code)
+        if total_mc is None:
+            total_mc = self._sum_mc_histograms(mc_histograms, "total_mc_for_uncertainty")
         
         # Create and style MC uncertainty band (EXACT existing styling)
         mc_uncertainty = total_mc.Clone("mc_uncertainty")
@@ -609,23 +814,27 @@ class PlotterDataMC(PlotterBase):
         if final_state_label:
             self._draw_region_label(canvas, final_state_label, x_pos=0.4, y_pos=0.93, textsize=0.05, plot_type="datamc")
     
-    def _clean_mc_label(self, label):
+    # Skim/version suffixes stripped from file-based labels
+    _CLEAN_RE = re.compile(r'Skim_v43|Skim|_v43')
+    # Standard physics process names, first substring match wins
+    _LABEL_MAP = (
+        ('QCD', 'QCD multijets'),
+        ('WJets', 'W + jets'),
+        ('ZJets', 'Z + jets'),
+        ('GJets', '#gamma + jets'),
+        ('TTXJets', 't#bar{t} + X'),
+        ('TTJets', 't#bar{t} + jets'),
+    )
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _clean_mc_label(label):
         """Extract clean physics process name from file-based label."""
         # Remove common suffixes
-        clean_label = label.replace("Skim_v43", "").replace("Skim", "").replace("_v43", "")
-        
-        # Map to standard physics process names
-        label_mapping = {
-            'QCD': 'QCD multijets',
-            'WJets': 'W + jets', 
-            'ZJets': 'Z + jets',
-            'GJets': '#gamma + jets',
-            'TTXJets': 't#bar{t} + X',
-            'TTJets': 't#bar{t} + jets'
-        }
+        clean_label = PlotterDataMC._CLEAN_RE.sub('', label)
         
         # Find matching process
-        for key, clean_name in label_mapping.items():
+        for key, clean_name in PlotterDataMC._LABEL_MAP:
             if key in clean_label:
                 return clean_name
         
@@ -635,86 +844,69 @@ class PlotterDataMC(PlotterBase):
     def create_histogram(self, data, weights, bins, x_min, x_max, title, color=ROOT.kBlack, style=1):
         """Create and fill histogram with proper styling."""
         # Create the histogram
-        name = f"h_{title}_{np.random.randint(0, 10000)}"
+        name = f"h_{title}_{next(PlotterBase._name_counter)}"
         hist = ROOT.TH1F(name, title, bins, x_min, x_max)
-        hist.SetDirectory(0)
-        hist.Sumw2()
         
-        # Safety check and fill histogram
-        if len(data) > 0 and len(weights) > 0:
+        # Safety check and fill histogram; float32 loader arrays and contiguous
+        # float64 inputs are used without a copy
+        data_array = _fill_array(data)
+        weights_array = np.ascontiguousarray(weights, dtype=np.float64)
+        if data_array.size > 0 and weights_array.size > 0:
             # Ensure arrays are same length
-            min_len = min(len(data), len(weights))
-            if min_len != len(data) or min_len != len(weights):
-                print(f"Warning: Mismatched array lengths - data: {len(data)}, weights: {len(weights)}")
+            min_len = min(data_array.size, weights_array.size)
+            if min_len != data_array.size or min_len != weights_array.size:
+                print(f"Warning: Mismatched array lengths - data: {data_array.size}, weights: {weights_array.size}")
             
-            # Use FillN for efficient filling
-            data_array = np.array(data[:min_len], dtype=np.float64)
-            weights_array = np.array(weights[:min_len], dtype=np.float64)
-            hist.FillN(min_len, data_array, weights_array)
+            # Fill the first min_len entries with one vectorized binning pass
+            _fill_hist_1d(hist, data_array, weights_array, min_len)
+
+        self._apply_mc_style(hist, color, style)
+        return hist
 
-        # Styling
+    @staticmethod
+    def _apply_mc_style(hist, color, style=1):
+        """Apply the stacked-MC look (black outline, filled with color) in one place."""
         hist.SetLineColor(ROOT.kBlack)
         hist.SetLineStyle(style)
         hist.SetLineWidth(1)
-        hist.SetFillColor(color) 
+        hist.SetFillColor(color)
         hist.SetStats(0)
-        return hist
 
     
-    def create_data_mc_comparison(self, data_collection, mc_collection, var_name, var_label, bins, x_min, x_max, blind_data=False, final_state_label=None, suffix="", normalized=False):
-        """Create data/MC comparison plot with ratio panel using CMS styling."""
-        canvas_name = f"datamc_{var_name}_{suffix}"
-        if normalized:
-            canvas_name = f"datamc_norm_{var_name}_{suffix}"
-        
+    def build_data_mc_histograms(self, data_collection, mc_collection, var_name, bins, x_min, x_max, blind_data=False):
+        """
+        Fill the (unnormalized) MC and data histograms for one variable.
+        Returns (mc_histograms, data_hist, total_mc); data_hist is None when blinded
+        or no data, total_mc is the summed MC (None without MC), built during the fill.
+        """
         # Ensure our MC colors are properly defined before creating histograms
         self._ensure_mc_colors()
         
-        # Use shared canvas setup
-        canvas, pad1, pad2 = self._setup_comparison_canvas(canvas_name, x_min, x_max, var_label)
-        
-        # Setup main pad with standard data/MC grid
-        pad1.cd() 
-        pad1.SetGridx(True)
-        pad1.SetGridy(True)
-        pad1.SetLogy(True)
-        pad1.SetLeftMargin(self.style.margin_left+0.04)
-        pad1.SetRightMargin(self.style.margin_right_ratio)
+        # Use the correct weights for this specific variable
+        mapped_var = self._map_var_name(var_name)
+        var_weights_key = f'{mapped_var}_weights'
         
-        # Create MC histograms
-        mc_histograms = []
+        # Create MC histograms, summing the total MC and taking each yield as we go
+        mc_entries = []
+        total_mc = None
         for i, (filename, data) in enumerate(mc_collection.items()):
-            color = self._get_background_color_index(filename)
+            color = _bg_color(filename)
             
-            # Use the correct weights for this specific variable
-            mapped_var = self._map_var_name(var_name)
-            var_weights_key = f'{mapped_var}_weights'
-            weights_to_use = data.get(var_weights_key, data.get('weights', []))
+            weights_to_use = _var_weights(data, var_weights_key)
             
             h = self.create_histogram(data[mapped_var], weights_to_use, bins, x_min, x_max, filename, color=color)
+            if total_mc is None:
+                total_mc = h.Clone("total_mc")
+                total_mc.SetDirectory(0)
+            else:
+                total_mc.Add(h)
             
             bg_name = self._clean_mc_label(parse_background_name(filename))
-            mc_histograms.append((h, bg_name))
+            mc_entries.append((h, bg_name, h.Integral()))
         
         # Sort MC histograms by yield (ascending order)
-        mc_histograms.sort(key=lambda x: x[0].Integral())
-        
-        # Create THStack for MC
-        stack = ROOT.THStack("stack", "")
-        for mc_hist, _ in mc_histograms:
-            stack.Add(mc_hist)
-            
-        # Apply normalization after histograms are created but before drawing
-        if normalized:
-            # Get total MC integral for normalization
-            total_mc_integral = 0
-            for mc_hist, _ in mc_histograms:
-                total_mc_integral += mc_hist.Integral()
-            
-            # Normalize each MC histogram by the total MC integral
-            if total_mc_integral > 0:
-                for mc_hist, _ in mc_histograms:
-                    mc_hist.Scale(1.0 / total_mc_integral)
+        mc_entries.sort(key=lambda entry: entry[2])
+        mc_histograms = [(h, bg_name) for h, bg_name, _ in mc_entries]
         
         # Create data histogram (if not blinded)
         data_hist = None
@@ -722,47 +914,100 @@ class PlotterDataMC(PlotterBase):
             # Combine all data files
             combined_data = self._combine_data_collections(data_collection)
             if combined_data:
-                # Use the correct weights for this specific variable
-                mapped_var = self._map_var_name(var_name)
-                var_weights_key = f'{mapped_var}_weights'
-                weights_to_use = combined_data.get(var_weights_key, combined_data.get('weights', []))
+                weights_to_use = _var_weights(combined_data, var_weights_key)
                 data_hist = self.create_histogram(combined_data[mapped_var], weights_to_use, bins, x_min, x_max, "data", color=self.data_color)
                 data_hist.SetMarkerStyle(20)
                 data_hist.SetMarkerSize(self.style.data_marker_size)
                 data_hist.SetLineWidth(self.style.data_line_width)
-                
-                # Normalize data if requested
-                if normalized and data_hist.Integral() > 0:
-                    data_hist.Scale(1.0 / data_hist.Integral())
+        
+        return mc_histograms, data_hist, total_mc
+    
+    def create_data_mc_comparison(self, data_collection, mc_collection, var_name, var_label, bins, x_min, x_max, blind_data=False, final_state_label=None, suffix="", normalized=False, histograms=None):
+        """
+        Create data/MC comparison plot with ratio panel using CMS styling.
+        histograms: optional (mc_histograms, data_hist, total_mc) from
+        build_data_mc_histograms, so the regular and normalized plots of a variable
+        can share one fill.
+        """
+        canvas_name = f"datamc_{var_name}_{suffix}"
+        if normalized:
+            canvas_name = f"datamc_norm_{var_name}_{suffix}"
+        
+        if histograms is None:
+            histograms = self.build_data_mc_histograms(data_collection, mc_collection, var_name, bins, x_min, x_max, blind_data=blind_data)
+        mc_histograms, data_hist, total_mc_hist = histograms
+        
+        # Use shared canvas setup
+        canvas, pad1, pad2 = self._setup_comparison_canvas(canvas_name, x_min, x_max, var_label)
+        
+        # Setup main pad with standard data/MC grid
+        pad1.cd() 
+        pad1.SetGridx(True)
+        pad1.SetGridy(True)
+        pad1.SetLogy(True)
+        pad1.SetLeftMargin(self.style.margin_left+0.04)
+        pad1.SetRightMargin(self.style.margin_right_ratio)
+        
+        # The summed MC from the fill feeds the normalization, the uncertainty
+        # band and the ratio.
+        # Apply normalization before drawing; scale clones so histograms
+        # shared with the unnormalized plot are left untouched
+        if normalized:
+            # Total MC integral for normalization: one scan of the summed histogram
+            # instead of one Integral() per MC histogram
+            total_mc_integral = total_mc_hist.Integral() if total_mc_hist else 0
+            if total_mc_hist:
+                total_mc_hist = total_mc_hist.Clone("total_mc_norm")
+                total_mc_hist.SetDirectory(0)
+                if total_mc_integral > 0:
+                    total_mc_hist.Scale(1.0 / total_mc_integral)
+            
+            norm_histograms = []
+            for mc_hist, bg_name in mc_histograms:
+                h_norm = mc_hist.Clone(f"{mc_hist.GetName()}_norm")
+                h_norm.SetDirectory(0)
+                # Normalize each MC histogram by the total MC integral
+                if total_mc_integral > 0:
+                    h_norm.Scale(1.0 / total_mc_integral)
+                norm_histograms.append((h_norm, bg_name))
+            mc_histograms = norm_histograms
+            
+            # Normalize data if requested
+            if data_hist:
+                data_hist = data_hist.Clone(f"{data_hist.GetName()}_norm")
+                data_hist.SetDirectory(0)
+                normalize_hist(data_hist)
+        
+        # Create THStack for MC
+        stack = ROOT.THStack("stack", "")
+        for mc_hist, _ in mc_histograms:
+            stack.Add(mc_hist)
         
         # Set axis ranges
         data_max = data_hist.GetMaximum() if data_hist else 0
         stack_max = stack.GetMaximum()
         max_val = max(data_max, stack_max)
         
-        # Draw stack and data with grid behind histograms
-        stack.Draw("HIST")
-        pad1.RedrawAxis("G")  # Draw grid lines behind everything  
-        stack.Draw("HIST SAME")  # Redraw histogram content on top of grid
-        
-        # Set axis ranges after all drawing is complete
+        # Set the range before drawing; THStack::Paint picks up the maximum and
+        # minimum, so there is no need to materialize the stack histogram first
         if normalized:
             # For normalized plots, use fixed range that works with log scale
             stack.SetMaximum(max_val * 5.)
             stack.SetMinimum(2e-4)
-            stack.GetHistogram().GetYaxis().SetRangeUser(2e-4, max_val * 5.)
         else:
             # For regular plots, use the original scaling
             stack.SetMaximum(max_val * 10.)
             stack.SetMinimum(0.5)
-            stack.GetHistogram().GetYaxis().SetRangeUser(0.5, max_val * 10)
+        
+        # Draw stack and data with grid behind histograms: the pad grid is painted
+        # with the frame, before the stack contents, so one Draw suffices
+        stack.Draw("HIST")
         stack.GetXaxis().SetLabelSize(0)
         
         # Set y-axis title based on normalization
         if normalized:
             # Extract just the variable name without units for the normalized y-axis title
-            import re
-            clean_var = re.sub(r'\s*\[.*?\]', '', var_label).strip()
+            clean_var = _clean_var_label(var_label)
             y_axis_title = f"#frac{{1}}{{N}}  #frac{{dN}}{{d({clean_var})}}"
         else:
             y_axis_title = "number of events"
@@ -774,7 +1019,7 @@ class PlotterDataMC(PlotterBase):
         stack.GetYaxis().CenterTitle(True)
         
         # Create and add MC uncertainty band using helper
-        mc_uncertainty = self._create_mc_uncertainty_band(mc_histograms)
+        mc_uncertainty = self._create_mc_uncertainty_band(mc_histograms, total_mc_hist)
         if mc_uncertainty:
             mc_uncertainty.Draw("E2 SAME")  # E2 = error band only (no markers)
         
@@ -800,12 +1045,6 @@ class PlotterDataMC(PlotterBase):
             pad2.SetLeftMargin(self.style.margin_left+0.04)
             pad2.SetRightMargin(self.style.margin_right_ratio)
             
-            # Create total MC histogram for ratio
-            total_mc_hist = mc_histograms[0][0].Clone("total_mc")
-            total_mc_hist.Reset()
-            for mc_hist, _ in mc_histograms:
-                total_mc_hist.Add(mc_hist)
-            
             # Create ratio histogram
             ratio_hist = data_hist.Clone("ratio")
             ratio_hist.Divide(total_mc_hist)
@@ -871,53 +1110,26 @@ class PlotterDataMC(PlotterBase):
     
     def _get_background_color_index(self, filename):
         """Get the color index for a specific background based on physics process."""
-        import re
-        from src.utils import parse_background_name
-
-        def _normalize(s):
-            # Pad + with spaces and collapse whitespace so "W+jets" == "W + jets"
-            return re.sub(r'\s+', ' ', re.sub(r'\s*\+\s*', ' + ', s)).strip()
-
-        bg_name = parse_background_name(filename)
-
-        # Background to color mapping (using original hex color indices)
-        # QCD=purple, WJets=teal, ZJets=yellow/gold, TTX=red/orange, GJets=pink/rose
-        background_color_map = {
-            'QCD multijets': 1179,        # #5A4484 - Purple
-            'W + jets': 1180,             # #347889 - Teal/Blue-green
-            'Z + jets': 1181,             # #F4B240 - Yellow/Gold
-            't#bar{t} + X': 1182,         # #E54B26 - Red/Orange
-            't#bar{t} + jets': 1182,      # #E54B26 - Red/Orange (same as TTX)
-            '#gamma + jets': 1183,        # #C05780 - Pink/Rose
-            # Assign remaining backgrounds to remaining colors
-            'Drell-Yan': 1184,            # #7A68A6 - Light purple
-            'Diboson': 1185,              # #2E8B57 - Sea green
-            'Single top': 1186,           # #8B4513 - Saddle brown
-        }
-
-        # Try parsed name first, then raw filename (handles YAML group names like "W+jets")
-        for candidate in [bg_name, filename]:
-            color = background_color_map.get(_normalize(candidate))
-            if color is not None:
-                return color
-
-        return 1179  # Default to purple if not found
+        return _bg_color(filename)
+
+    # MC colors from rootlogon.C as (index, (r, g, b)): #5A4484, #347889, #F4B240,
+    # #E54B26, #C05780, #7A68A6, #2E8B57, #8B4513
+    _MC_RGB = tuple(
+        (index, (int(hex_color[0:2], 16) / 255.0,
+                 int(hex_color[2:4], 16) / 255.0,
+                 int(hex_color[4:6], 16) / 255.0))
+        for index, hex_color in zip(
+            range(1179, 1187),
+            ("5A4484", "347889", "F4B240", "E54B26", "C05780", "7A68A6", "2E8B57", "8B4513")))
+    # ROOT colors are process-global, so one initialization serves every plotter
+    _colors_ensured = False
 
     def _ensure_mc_colors(self):
         """Force recreation of MC colors at specific indices to override palette interference."""
-        # Define the hex colors and expected indices from rootlogon.C
-        hex_colors = ["#5A4484", "#347889", "#F4B240", "#E54B26", "#C05780", "#7A68A6", "#2E8B57", "#8B4513"]
-        expected_indices = [1179, 1180, 1181, 1182, 1183, 1184, 1185, 1186]
+        if self._colors_ensured and self._mc_colors_intact():
+            return
         
-        for i, hex_color in enumerate(hex_colors):
-            expected_index = expected_indices[i]
-            
-            # Parse hex color to RGB
-            hex_clean = hex_color.replace("#", "")
-            r = int(hex_clean[0:2], 16) / 255.0
-            g = int(hex_clean[2:4], 16) / 255.0  
-            b = int(hex_clean[4:6], 16) / 255.0
-            
+        for expected_index, (r, g, b) in self._MC_RGB:
             # Get existing color or create new one
             existing_color = ROOT.gROOT.GetColor(expected_index)
             if existing_color:
@@ -926,30 +1138,49 @@ class PlotterDataMC(PlotterBase):
             else:
                 # Create new color at specific index
                 ROOT.TColor(expected_index, r, g, b)
+        PlotterDataMC._colors_ensured = True
+    
+    def _mc_colors_intact(self):
+        """Cheap check that the first MC color still holds its RGB values."""
+        index, rgb = self._MC_RGB[0]
+        color = ROOT.gROOT.GetColor(index)
+        return bool(color) and all(
+            abs(have - want) < 1e-3
+            for have, want in zip((color.GetRed(), color.GetGreen(), color.GetBlue()), rgb))
     
     def _combine_data_collections(self, data_collection):
         """Combine data from multiple files into single dataset."""
         if not data_collection:
             return None
+
+        # Every variable of a region is plotted from the same collection;
+        # merge it once and reuse the result
+        cached_collection, cached = self._combined_cache
+        if cached_collection is data_collection:
+            return cached
             
         # Get the first file's data structure
         first_file_data = next(iter(data_collection.values()))
-        combined_data = {}
-        
-        # Initialize with empty arrays
-        for key in first_file_data.keys():
-            combined_data[key] = []
-        
-        # Combine data from all files
+        if len(data_collection) == 1:
+            # Nothing to combine: hand the file's arrays through
+            return {key: np.asarray(values) for key, values in first_file_data.items()}
+
+        # Scalar per-file entries (metadata) can't be concatenated; gather them
+        # into one array per key instead
+        scalar_keys = [key for key, values in first_file_data.items() if np.ndim(values) == 0]
+        combined_data = {key: np.fromiter((file_data[key] for file_data in data_collection.values()),
+                                          dtype=np.float64, count=len(data_collection))
+                         for key in scalar_keys}
+
+        # Collect each array key's per-file arrays and concatenate them once
+        buckets = {key: [] for key in first_file_data if key not in combined_data}
         for file_data in data_collection.values():
             for key, values in file_data.items():
-                if key in combined_data:
-                    combined_data[key].extend(values)
-        
-        # Convert to numpy arrays
-        for key in combined_data:
-            combined_data[key] = np.array(combined_data[key])
+                if key in buckets:
+                    buckets[key].append(np.asarray(values))
+        combined_data.update((key, np.concatenate(arrays)) for key, arrays in buckets.items())
         
+        self._combined_cache = (data_collection, combined_data)
         return combined_data
 
     def create_unrolled_comparison(self, data_collection, mc_collection, scheme="merged_rs", blind_data=False, final_state_label=None, suffix="", normalized=False):
@@ -971,31 +1202,28 @@ class PlotterDataMC(PlotterBase):
             y1d, e1d, bin_labels, decorations = unroller.unroll(y2d, e2d)
             
             # Create Histogram - create empty histogram and set bin contents directly
-            color = self._get_background_color_index(filename)
+            color = _bg_color(filename)
             nbins = len(y1d)
             
             # Create empty histogram with proper binning
-            name = f"h_unrolled_{filename}_{np.random.randint(0, 10000)}"
+            name = f"h_unrolled_{filename}_{next(PlotterBase._name_counter)}"
             h = ROOT.TH1F(name, filename, nbins, 0, nbins)
-            h.SetDirectory(0)
-            h.Sumw2()
             
             # Set bin contents and errors directly from unrolled yields
             for i in range(nbins):
                 h.SetBinContent(i+1, y1d[i])
                 h.SetBinError(i+1, e1d[i])
             
-            # Set colors
-            h.SetFillColor(color)
-            h.SetLineColor(ROOT.kBlack)
-            h.SetLineWidth(1)
-            h.SetStats(0)
+            self._apply_mc_style(h, color)
             
             bg_name = self._clean_mc_label(parse_background_name(filename))
             mc_histograms.append((h, bg_name))
         
-        # Sort MC by yield
-        mc_histograms.sort(key=lambda x: x[0].Integral())
+        # Sort MC by yield (ascending); keep the integrals for the normalization
+        mc_integrals = [h.Integral() for h, _ in mc_histograms]
+        order = sorted(range(len(mc_histograms)), key=mc_integrals.__getitem__)
+        mc_histograms = [mc_histograms[i] for i in order]
+        mc_integrals = [mc_integrals[i] for i in order]
         
         # --- 2. Process Data ---
         data_hist = None
@@ -1008,10 +1236,8 @@ class PlotterDataMC(PlotterBase):
                 nbins = len(y1d)
                 
                 # Create empty data histogram and set bin contents directly  
-                name = f"h_unrolled_data_{np.random.randint(0, 10000)}"
+                name = f"h_unrolled_data_{next(PlotterBase._name_counter)}"
                 data_hist = ROOT.TH1F(name, "data", nbins, 0, nbins)
-                data_hist.SetDirectory(0)
-                data_hist.Sumw2()
                 
                 # Set bin contents and errors directly from unrolled yields
                 for i in range(nbins):
@@ -1029,14 +1255,14 @@ class PlotterDataMC(PlotterBase):
         # --- 3. Normalization ---
         if normalized:
              # Normalize MC Stack
-            total_mc_integral = sum(h[0].Integral() for h in mc_histograms)
+            total_mc_integral = sum(mc_integrals)
             if total_mc_integral > 0:
                 for h, _ in mc_histograms:
                     h.Scale(1.0 / total_mc_integral)
             
             # Normalize Data
-            if data_hist and data_hist.Integral() > 0:
-                data_hist.Scale(1.0 / data_hist.Integral())
+            if data_hist:
+                normalize_hist(data_hist)
 
         # --- 4. Plotting Infrastructure (Reuse internal logic if possible, or replicate essential parts) ---
         # We replicate essential parts of create_data_mc_comparison but adapt for custom axis labels and decorations
@@ -1064,10 +1290,6 @@ class PlotterDataMC(PlotterBase):
         for h, _ in mc_histograms:
             stack.Add(h)
 
-        stack.Draw("HIST")
-        pad1.RedrawAxis("G")  # Draw grid lines behind everything
-        stack.Draw("HIST SAME")  # Redraw histogram content on top of grid
-            
         # Range
         data_max = data_hist.GetMaximum() if data_hist else 0
         stack_max = stack.GetMaximum()
@@ -1081,22 +1303,20 @@ class PlotterDataMC(PlotterBase):
         if normalized:
             # Use same normalized y-title format as data/MC 
             if "rs" in scheme.lower():
-                import re
                 clean_var = "R_{S}"  
                 y_title = f"#frac{{1}}{{N}}  #frac{{dN}}{{d({clean_var})}}"
             else:  # ms scheme
-                import re  
                 clean_var = "M_{S}"
                 y_title = f"#frac{{1}}{{N}}  #frac{{dN}}{{d({clean_var})}}"
             stack.SetMaximum(max_val * 5.)
             stack.SetMinimum(2e-4) 
-            stack.GetHistogram().GetYaxis().SetRangeUser(2e-4, max_val * 5.)
         else:
             y_title = "number of events"
-            stack.GetHistogram().GetYaxis().SetRangeUser(0.5, max_val * 10)
             stack.SetMaximum(max_val * 10.)
             stack.SetMinimum(0.5)
-            stack.GetHistogram().GetYaxis().SetRangeUser(0.5, max_val * 10.)
+        
+        # Draw once with the range already set
+        stack.Draw("HIST")  # pad grid is painted with the frame, behind the stack
             
         # Apply original unrolled axis formatting
         stack.GetYaxis().SetTitle(y_title)
@@ -1106,8 +1326,11 @@ class PlotterDataMC(PlotterBase):
         stack.GetYaxis().CenterTitle(True)
         stack.GetXaxis().SetLabelSize(0)      # Hide default numbers
         
+        # Sum the MC once; it feeds both the uncertainty band and the ratio
+        total_mc_hist = self._sum_mc_histograms(mc_histograms, "total_mc_ratio")
+        
         # Create MC uncertainty using shared helper (EXACT same styling as data/MC)
-        mc_uncertainty = self._create_mc_uncertainty_band(mc_histograms)
+        mc_uncertainty = self._create_mc_uncertainty_band(mc_histograms, total_mc_hist)
         if mc_uncertainty:
             mc_uncertainty.Draw("E2 SAME")
 
@@ -1171,11 +1394,6 @@ class PlotterDataMC(PlotterBase):
             pad2.SetTopMargin(0.0)
             pad2.SetBottomMargin(0.4)
             
-            total_mc_hist = mc_histograms[0][0].Clone("total_mc_ratio")
-            total_mc_hist.Reset()
-            for h, _ in mc_histograms:
-                total_mc_hist.Add(h)
-                
             ratio_hist = data_hist.Clone("ratio")
             ratio_hist.SetStats(0)
             ratio_hist.Divide(total_mc_hist)
@@ -1,6 +1,10 @@
 import re
+from functools import lru_cache
 from pathlib import Path
 
+# Both parsers are called with the same file names for every flag and plot
+# type, so results are memoised on the (immutable) filename string.
+@lru_cache(maxsize=4096)
 def parse_signal_name(filename):
     """Parse signal file name to extract physics parameters"""
     stem = Path(filename).stem
@@ -21,6 +25,7 @@ def parse_signal_name(filename):
     else:
         return stem
 
+@lru_cache(maxsize=4096)
 def parse_background_name(filename):
     """Parse background file name to extract clean physics process name"""
     # Extract filename without path and extension
@@ -0,0 +1,48 @@
+import importlib.util
+import unittest
+
+_HAVE_DEPS = all(importlib.util.find_spec(mod) for mod in ('numpy', 'ROOT'))
+
+# (nbins, lo, hi) of axes whose bin edges are hit exactly by the filled values
+_AXES = [
+    (15, 5, 20),        # HadronicSV_nTracks: integer counts
+    (10, 0, 10),        # rjrIsr_nSVisObjects
+    (50, -3.1, 3.1),    # selPhoEta
+    (25, 0.6, 1),       # HadronicSV_pOverE
+    (60, -5, 10),       # baseLinePhoton_WTimeSig
+]
+
+
+@unittest.skipUnless(_HAVE_DEPS, "requires numpy and ROOT")
+class AxisBinsMatchFindBinTest(unittest.TestCase):
+    def _edge_values(self, np, nbins, lo, hi):
+        width = (hi - lo) / nbins
+        edges = lo + width * np.arange(nbins + 1)
+        return np.concatenate((edges, np.linspace(lo, hi, nbins + 1),
+                               np.arange(np.floor(lo) - 1, np.ceil(hi) + 2),
+                               [np.nan, np.inf, -np.inf]))
+
+    def test_edges_match_findfixbin(self):
+        import numpy as np
+        import ROOT
+        from src import _hist_kernels
+        from src.plotter import _axis_bins
+
+        for nbins, lo, hi in _AXES:
+            axis = ROOT.TAxis(nbins, lo, hi)
+            values = self._edge_values(np, nbins, lo, hi)
+            expected = [axis.FindFixBin(v) for v in values]
+            with self.subTest(axis=(nbins, lo, hi)):
+                self.assertEqual(_axis_bins(values, nbins, lo, hi).tolist(), expected)
+                self.assertEqual(
+                    [_hist_kernels._find_bin(v, nbins, float(lo), float(hi - lo), float(hi))
+                     for v in values],
+                    expected)
+                # float32 loader output must bin like its float64 value does in ROOT
+                values32 = values.astype(np.float32)
+                self.assertEqual(_axis_bins(values32, nbins, lo, hi).tolist(),
+                                 [axis.FindFixBin(float(v)) for v in values32])
+
+
+if __name__ == '__main__':
+    unittest.main()
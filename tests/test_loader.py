@@ -0,0 +1,238 @@
+import importlib.util
+import unittest
+
+_HAVE_DEPS = all(importlib.util.find_spec(mod) for mod in ('numpy', 'uproot'))
+
+
+@unittest.skipUnless(_HAVE_DEPS, "requires numpy and uproot")
+class BuildScalarPrefilterTest(unittest.TestCase):
+    def setUp(self):
+        from src.loader import DataLoader
+        self.loader = DataLoader()
+
+    def test_or_cut(self):
+        prefilter = self.loader._build_scalar_prefilter(
+            ['nSelPhotons==1 || SV_nHadronic>0'], ['nSelPhotons', 'SV_nHadronic'], None)
+        self.assertEqual(prefilter, '(((nSelPhotons == 1)) | ((SV_nHadronic > 0)))')
+
+    def test_or_of_and_clauses_drops_unknown_branches(self):
+        # baseLinePhoton_WTimeSig is jagged, so only the scalar part of its clause is kept
+        prefilter = self.loader._build_scalar_prefilter(
+            ['(nSelPhotons==1 && selCMet>200) || (SV_nLeptonic>=1 && baseLinePhoton_WTimeSig>2)'],
+            ['nSelPhotons', 'selCMet', 'SV_nLeptonic', 'baseLinePhoton_WTimeSig'], None)
+        self.assertEqual(
+            prefilter,
+            '(((nSelPhotons == 1) & (selCMet > 200)) | ((SV_nLeptonic >= 1)))')
+
+
+def _jagged(*rows):
+    """Object array of per-event float32 arrays, as uproot returns jagged branches."""
+    import numpy as np
+    arr = np.empty(len(rows), dtype=object)
+    for i, row in enumerate(rows):
+        arr[i] = np.asarray(row, dtype=np.float32)
+    return arr
+
+
+@unittest.skipUnless(_HAVE_DEPS, "requires numpy and uproot")
+class ExtractValuesTest(unittest.TestCase):
+    """
+    Expected values follow the original per-event loop: events failing the
+    mode validation are dropped, rjr variables take their leading element
+    subject to the paired cross-cut, SV/photon collections repeat the event
+    weight per object, and scalars take one value per event.
+    """
+
+    def _uncompressed_chunk(self):
+        import numpy as np
+        # e2 fails rjrPTS < 150, e3 has no rjr_Ms, e4 is outside the mask
+        return {
+            'rjr_Ms': _jagged([2000., 500.], [800.], [1500.], [], [3000.], [1200.]),
+            'rjr_Rs': _jagged([0.3, 0.1], [0.1], [0.5], [0.2], [0.9], [0.2]),
+            'rjrPTS': _jagged([100.], [50.], [200.], [10.], [1.], [149.]),
+            'evtFillWgt': np.array([0.5, 2.0, 1.0, 1.0, 1.0, 1.5]),
+            'selCMet': np.array([200., 300., 400., 500., 600., 180.], dtype=np.float32),
+            'HadronicSV_mass': _jagged([1., 2.], [], [3.], [4.], [5.], [7.]),
+            'baseLinePhoton_WTimeSig': _jagged([3.], [1., 2.], [], [], [6.], []),
+            'baseLinePhoton_GenTimeSig': _jagged([9.], [4., 5.], [], [], [6.], []),
+        }
+
+    def _compressed_chunk(self):
+        import numpy as np
+        # e1 fails the ISR pT cut, e2 has no SV visible objects
+        return {
+            'rjrIsr_PtIsr': np.array([400., 250., 500., 350.], dtype=np.float32),
+            'rjrIsr_nSVisObjects': np.array([1, 1, 0, 2], dtype=np.int32),
+            'rjrIsr_Ms': np.array([100., 200., 300., 400.], dtype=np.float32),
+            'evtFillWgt': np.array([1.0, 1.0, 1.0, 2.0]),
+            'HadronicSV_mass': _jagged([5., 6.], [7.], [8.], []),
+            'baseLinePhoton_WTimeSig': _jagged([1.], [2.], [3.], [4.]),
+            # e0 has no R_S, so its M_S is not cross-cut
+            'rjr_Ms': _jagged([2000.], [1000.], [1000.], [1500.]),
+            'rjr_Rs': _jagged([], [0.5], [0.5], [0.1]),
+        }
+
+    def _check(self, extracted, expected):
+        import numpy as np
+        from src.loader import VALUE_DTYPE
+        expected_keys = set(expected) | {f'{key}_weights' for key in expected}
+        self.assertEqual(set(extracted), expected_keys)
+        for key, (values, weights) in expected.items():
+            self.assertEqual(extracted[key].dtype, VALUE_DTYPE, key)
+            np.testing.assert_allclose(extracted[key], values, rtol=1e-6, err_msg=key)
+            np.testing.assert_allclose(extracted[f'{key}_weights'], weights,
+                                       rtol=1e-12, err_msg=f'{key}_weights')
+
+    def test_uncompressed_mc(self):
+        import numpy as np
+        from src.loader import DataLoader
+        loader = DataLoader(luminosity=10)
+        mask = np.array([True, True, True, True, False, True])
+        extracted = loader._extract_values(self._uncompressed_chunk(), mask, is_data=False)
+        self._check(extracted, {
+            # e1 fails both cross-cuts (R_S = 0.1, M_S = 0.8 TeV)
+            'rjr_Ms': ([2.0, 1.2], [5., 15.]),
+            'rjr_Rs': ([0.3, 0.2], [5., 15.]),
+            'selCMet': ([200., 300., 180.], [5., 20., 15.]),
+            'HadronicSV_mass': ([1., 2., 7.], [5., 5., 15.]),
+            'baseLinePhoton_WTimeSig': ([3., 1., 2.], [5., 20., 20.]),
+            'baseLinePhoton_GenTimeSig': ([9., 4., 5.], [5., 20., 20.]),
+        })
+
+    def test_uncompressed_data(self):
+        import numpy as np
+        from src.loader import DataLoader
+        loader = DataLoader(luminosity=10)
+        mask = np.array([True, True, True, True, False, True])
+        extracted = loader._extract_values(self._uncompressed_chunk(), mask, is_data=True)
+        # Unit weights, and no MC-only (gen) variables
+        self._check(extracted, {
+            'rjr_Ms': ([2.0, 1.2], [1., 1.]),
+            'rjr_Rs': ([0.3, 0.2], [1., 1.]),
+            'selCMet': ([200., 300., 180.], [1., 1., 1.]),
+            'HadronicSV_mass': ([1., 2., 7.], [1., 1., 1.]),
+            'baseLinePhoton_WTimeSig': ([3., 1., 2.], [1., 1., 1.]),
+        })
+
+    def test_compressed_mc(self):
+        import numpy as np
+        from src.loader import DataLoader
+        loader = DataLoader(luminosity=10, analysis_mode='compressed', isr_pt_cut=300)
+        extracted = loader._extract_values(self._compressed_chunk(), np.ones(4, dtype=bool),
+                                           is_data=False)
+        self._check(extracted, {
+            'rjrIsr_PtIsr': ([400., 350.], [10., 20.]),
+            'rjrIsr_nSVisObjects': ([1., 2.], [10., 20.]),
+            'rjrIsr_Ms': ([100., 400.], [10., 20.]),
+            # Leading SV only; e3 has none
+            'HadronicSV_mass': ([5.], [10.]),
+            # Photon variables are not extracted in compressed mode
+            'baseLinePhoton_WTimeSig': ([], []),
+            # e3 fails the R_S cross-cut; e0 has no R_S to cross-cut M_S with
+            'rjr_Ms': ([2.0], [10.]),
+            'rjr_Rs': ([0.1], [20.]),
+        })
+
+    def test_compressed_data(self):
+        import numpy as np
+        from src.loader import DataLoader
+        loader = DataLoader(luminosity=10, analysis_mode='compressed', isr_pt_cut=300)
+        extracted = loader._extract_values(self._compressed_chunk(), np.ones(4, dtype=bool),
+                                           is_data=True)
+        self._check(extracted, {
+            'rjrIsr_PtIsr': ([400., 350.], [1., 1.]),
+            'rjrIsr_nSVisObjects': ([1., 2.], [1., 1.]),
+            'rjrIsr_Ms': ([100., 400.], [1., 1.]),
+            'HadronicSV_mass': ([5.], [1.]),
+            'baseLinePhoton_WTimeSig': ([], []),
+            'rjr_Ms': ([2.0], [1.]),
+            'rjr_Rs': ([0.1], [1.]),
+        })
+
+    def test_empty_selection(self):
+        import numpy as np
+        from src.loader import DataLoader
+        loader = DataLoader(luminosity=10)
+        chunk = self._uncompressed_chunk()
+        self.assertEqual(loader._extract_values(chunk, np.zeros(6, dtype=bool)), {})
+        # Masked events that all fail validation
+        mask = np.array([False, False, True, True, False, False])
+        self.assertEqual(loader._extract_values(chunk, mask), {})
+
+
+class _FakeTree:
+    """Minimal stand-in for an uproot TTree holding flag branches."""
+
+    def __init__(self, num_entries, **flags):
+        import numpy as np
+        self.num_entries = num_entries
+        self._flags = {}
+        for name, entries in flags.items():
+            arr = np.zeros(num_entries, dtype=bool)
+            arr[list(entries)] = True
+            self._flags[name] = arr
+
+    def arrays(self, branches, library='np'):
+        return {name: self._flags[name] for name in branches}
+
+
+@unittest.skipUnless(_HAVE_DEPS, "requires numpy and uproot")
+class FlagEntryWindowsTest(unittest.TestCase):
+    def setUp(self):
+        from src.loader import DataLoader
+        self.loader = DataLoader()
+        self.gap = DataLoader._WINDOW_MERGE_GAP
+
+    def _windows(self, tree, event_flags, available=None):
+        if available is None:
+            available = list(tree._flags)
+        return self.loader._flag_entry_windows(tree, available, event_flags)
+
+    def test_sparse(self):
+        gap = self.gap
+        tree = _FakeTree(4 * gap, A=[5, 6, 2 * gap, 3 * gap + 1])
+        self.assertEqual(self._windows(tree, ['A']),
+                         [(5, 7), (2 * gap, 2 * gap + 1), (3 * gap + 1, 3 * gap + 2)])
+
+    def test_gap_boundary(self):
+        # A gap of exactly _WINDOW_MERGE_GAP is read through, one more splits
+        gap = self.gap
+        tree = _FakeTree(3 * gap, A=[100, 100 + gap, 101 + 2 * gap])
+        self.assertEqual(self._windows(tree, ['A']),
+                         [(100, 101 + gap), (101 + 2 * gap, 102 + 2 * gap)])
+
+    def test_dense(self):
+        tree = _FakeTree(40_000, A=range(0, 40_000, 100))
+        self.assertEqual(self._windows(tree, ['A']), [(0, 39_901)])
+
+    def test_empty(self):
+        tree = _FakeTree(1000, A=[])
+        self.assertEqual(self._windows(tree, ['A']), [])
+
+    def test_single_entry(self):
+        tree = _FakeTree(1000, A=[7])
+        self.assertEqual(self._windows(tree, ['A']), [(7, 8)])
+        tree = _FakeTree(1000, A=[999])
+        self.assertEqual(self._windows(tree, ['A']), [(999, 1000)])
+
+    def test_and_or_groups(self):
+        gap = self.gap
+        tree = _FakeTree(3 * gap, A=[10, 20], B=[20, 30], C=[2 * gap])
+        # Only entry 20 passes A+B; C adds its own window
+        self.assertEqual(self._windows(tree, ['A+B|C']),
+                         [(20, 21), (2 * gap, 2 * gap + 1)])
+        # Separate flags are OR-ed together
+        self.assertEqual(self._windows(tree, ['A+B', 'C']),
+                         [(20, 21), (2 * gap, 2 * gap + 1)])
+
+    def test_missing_flags(self):
+        tree = _FakeTree(1000, A=[3, 4])
+        # Groups using a flag absent from the tree are skipped
+        self.assertEqual(self._windows(tree, ['A|D'], available=['A']), [(3, 5)])
+        self.assertEqual(self._windows(tree, ['A+D'], available=['A']), [])
+        # No requested flag in the tree: nothing can pass
+        self.assertEqual(self._windows(tree, ['D'], available=['A']), [])
+
+
+if __name__ == '__main__':
+    unittest.main()